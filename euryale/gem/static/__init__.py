@@ -6,6 +6,12 @@ I put most classe in their own files for the sake of organization.
 from .box import Box
 from .compositor import Compositor
 from .dbox import DBox
+from .framebuffer import FrameBuffer
+from .keyreader import KeyReader
+from .scheduler import Scheduler
 from .segment import Segment
+from .sink import StdoutSink, FileSink, BytesSink
+from .stats import FrameStats
 from .style import Fore, Back, Style, Chars
 from .tbox import TBox
+from .wrapcache import WrapCache
@@ -5,10 +5,49 @@ attributes and methods for storing and rendering a simple box with a few
 fancy bits.
 
 """
-from .segment import Segment
+from contextlib import contextmanager
+from .framebuffer import FrameBuffer
 import math
 
 
+def resolve_layout(boxes):
+    """Resolve the positions of boxes and of everything they align to.
+
+    Boxes are placed in topological order over their alignment targets, so
+    every target is placed before the boxes aligned to it. Positions that are
+    still cached are reused.
+
+    Args:
+        boxes (list): Boxes to resolve.
+
+    Raises:
+        ValueError: If alignment targets form a cycle.
+        ValueError: If a box aligns to a target outside its container.
+
+    """
+    for box in boxes:
+        if box._layout is not None:
+            continue
+        stack = [(box, False)]
+        path = set()  # boxes waiting on their targets
+        while stack:
+            b, placed = stack.pop()
+            if placed:
+                path.discard(b)
+                b._layout = b._place()
+                continue
+            if b._layout is not None:
+                continue
+            path.add(b)
+            stack.append((b, True))
+            for t in {b.ytarget, b.xtarget}:
+                if isinstance(t, Box) and t._layout is None:
+                    if t in path:
+                        msg = "alignment targets of box '{}' form a cycle"
+                        raise ValueError(msg.format(b.name))
+                    stack.append((t, False))
+
+
 class Box:
     """Box Class.
 
@@ -87,8 +126,6 @@ class Box:
         splash = kwargs.get('splash', None)
         overlay = kwargs.get('overlay', False)
 
-        self.segments = []
-        self.grid = []
         # check arguments are valid
         if not isinstance(pos, tuple):
             raise TypeError('pos is not tuple')
@@ -100,6 +137,16 @@ class Box:
         if len(size) < 2:
             raise ValueError('size: too few coordinates given')
 
+        self._layout = None  # resolved position, None if out of date
+        self.container = None  # box this one is inside of, if any
+        self.children = []  # boxes inside this one, bottom to top
+        self._surface = None  # grid with children drawn on it
+        self._flat = False  # _surface is up to date
+        self._batch = 0  # depth of batch() blocks
+        self._dependents = set()  # boxes aligned to this one
+        self._ytarget = None
+        self._xtarget = None
+
         self._pos = pos
         self.ytarget = kwargs.get("ytarget", None)
         self.ytalign = kwargs.get("ytalign", "center")
@@ -112,6 +159,8 @@ class Box:
         self.parent = parent  # might be useful for some things
         self.name = name  # name is handled by compositor
         self.overlay = overlay  # overlay is handled by compositor
+        self.damaged = True  # content changed since last composite
+        self._mask = None  # transparency mask, None if out of date
 
         self.populate()
 
@@ -131,16 +180,66 @@ class Box:
     def pos(self):
         """Get position based on set position and/or alignment targets.
 
+        The position is resolved once and cached until this box or anything
+        it aligns to moves or changes.
+
+        Returns:
+            tuple: (y, x) coordinates.
+
+        """
+        if self._layout is None:
+            resolve_layout([self])
+        return self._layout
+
+    @pos.setter
+    def pos(self, pos):
+        if not isinstance(pos, tuple):
+            raise TypeError('argument is not tuple')
+        if len(pos) < 2:
+            raise ValueError('too few coordinates given')
+        self._pos = pos
+        self.invalidate_layout()
+
+    def _origin(self, target):
+        """Get the position of an alignment target relative to this box's.
+
+        Args:
+            target (Box, Compositor): Alignment target.
+
         Returns:
             tuple: (y, x) coordinates.
 
+        Raises:
+            ValueError: If target is neither the container of this box nor
+                inside the same container, or the compositor for boxes that
+                aren't inside any.
+
+        """
+        if target is self.container:
+            return (0, 0)
+        container = target.container if isinstance(target, Box) else None
+        if container is not self.container:
+            raise ValueError(
+                "alignment target of box '{}' is outside its container".format(
+                    self.name))
+        return target.pos
+
+    def _place(self):
+        """Calculate position from set position and resolved targets.
+
+        Returns:
+            tuple: (y, x) coordinates.
+
+        Raises:
+            ValueError: If a target is outside the container of this box.
+
         """
         y = 0
         x = 0
         # here comes the worst cluster of elif statements ever
         if self.ytarget is not None:
             h = self.size[0]
-            ty = self.ytarget.pos[0]
+            ty = self._origin(self.ytarget)[0]
             th = self.ytarget.size[0]
 
             if self.ytalign == "otop":
@@ -172,7 +271,7 @@ class Box:
 
         if self.xtarget is not None:
             w = self.size[1]
-            tx = self.xtarget.pos[1]
+            tx = self._origin(self.xtarget)[1]
             tw = self.xtarget.size[1]
 
             if self.xtalign == "oleft":
@@ -208,47 +307,386 @@ class Box:
 
         return (y, x)
 
-    @pos.setter
-    def pos(self, pos):
-        if not isinstance(pos, tuple):
-            raise TypeError('argument is not tuple')
-        if len(pos) < 2:
-            raise ValueError('too few coordinates given')
-        self._pos = pos
+    @property
+    def ytarget(self):
+        """Get or set the vertical alignment target (can be compositor).
+
+        Boxes inside another align to their container or boxes in the same
+        container, top level boxes to each other or the compositor.
+
+        Returns:
+            Box: Target, or None.
+
+        """
+        return self._ytarget
+
+    @ytarget.setter
+    def ytarget(self, target):
+        old = self._ytarget
+        self._ytarget = target
+        if old is not None and old not in (self._ytarget, self._xtarget):
+            old._dependents.discard(self)
+        if target is not None:
+            target._dependents.add(self)
+        self.invalidate_layout()
+
+    @property
+    def ytalign(self):
+        """Get or set the type of alignment to target vertically.
+
+        Returns:
+            str: Alignment type.
+
+        """
+        return self._ytalign
+
+    @ytalign.setter
+    def ytalign(self, align):
+        self._ytalign = align
+        self.invalidate_layout()
+
+    @property
+    def ysalign(self):
+        """Get or set the type of alignment to self vertically.
+
+        Returns:
+            str: Alignment type.
+
+        """
+        return self._ysalign
+
+    @ysalign.setter
+    def ysalign(self, align):
+        self._ysalign = align
+        self.invalidate_layout()
+
+    @property
+    def xtarget(self):
+        """Get or set the horizontal alignment target (can be compositor).
+
+        Boxes inside another align to their container or boxes in the same
+        container, top level boxes to each other or the compositor.
+
+        Returns:
+            Box: Target, or None.
+
+        """
+        return self._xtarget
+
+    @xtarget.setter
+    def xtarget(self, target):
+        old = self._xtarget
+        self._xtarget = target
+        if old is not None and old not in (self._ytarget, self._xtarget):
+            old._dependents.discard(self)
+        if target is not None:
+            target._dependents.add(self)
+        self.invalidate_layout()
+
+    @property
+    def xtalign(self):
+        """Get or set the type of alignment to target horizontally.
+
+        Returns:
+            str: Alignment type.
+
+        """
+        return self._xtalign
+
+    @xtalign.setter
+    def xtalign(self, align):
+        self._xtalign = align
+        self.invalidate_layout()
+
+    @property
+    def xsalign(self):
+        """Get or set the type of alignment to self horizontally.
+
+        Returns:
+            str: Alignment type.
+
+        """
+        return self._xsalign
+
+    @xsalign.setter
+    def xsalign(self, align):
+        self._xsalign = align
+        self.invalidate_layout()
+
+    @property
+    def size(self):
+        """Get or set the (height, width) size.
+
+        Setting the size doesn't resize the grid, use resize() for that.
+
+        Returns:
+            tuple: (height, width) size.
+
+        """
+        return self._size
+
+    @size.setter
+    def size(self, size):
+        self._size = size
+        self.invalidate_layout()
+        # children only follow the size of their container, not its position
+        for child in self.children:
+            if self in (child.ytarget, child.xtarget):
+                child.invalidate_layout()
+
+    def invalidate_layout(self):
+        """Forget the resolved position of this box and boxes aligned to it.
+
+        Children aligned to the box keep theirs, they are placed relative to
+        it.
+
+        """
+        if self._layout is not None:
+            self.request_frame()
+        stack = [self]
+        while stack:
+            box = stack.pop()
+            box._layout = None
+            if box.container is not None:
+                box.container.touch()
+            # boxes aligned to an unresolved box are never resolved
+            stack.extend(d for d in box._dependents
+                         if d._layout is not None and d.container is not box)
 
     def populate(self):
-        """Populate grid with default character segments.
+        """Populate grid with default character cells.
 
         Returns:
-            list: New grid, 2d list of segments.
+            FrameBuffer: New grid.
 
         """
-        for y in range(self.size[0]):
-            self.grid.append([])
-            for x in range(self.size[1]):
-                self.grid[y].append(Segment((y, x), self.dchar))
-                self.segments.append(self.grid[y][x])
+        self.grid = FrameBuffer(self.size, self.dchar)
+        self.touch()
 
         return self.grid
 
     def resize(self, newsize):
         """Resize the box.
 
+        Cells that fit in the new size are kept.
+
         Args:
             newsize (tuple): (height, width) size.
         """
-        grid = self.grid
-        if newsize <= self.size:
-            grid = [i[0:newsize[1]] for i in grid[0:newsize[0]]]
-        splashgrid = grid
-        for y, line in enumerate(grid):
-            for x, seg in enumerate(line):
-                splashgrid[y][x] = (seg.char, seg.fg, seg.bg)
-        self.grid = []
-        self.segments = []
         self.size = newsize
-        self.populate()
-        self.from_splash(splashgrid)
+        self.grid.resize(newsize, self.dchar)
+        self.touch()
+
+    def touch(self):
+        """Mark the grid content as changed.
+
+        Call this after writing to the grid directly.
+
+        """
+        if not self.damaged:
+            self.request_frame()
+        self.damaged = True
+        self._mask = None
+        self._flat = False
+        if self.container is not None:
+            self.container.touch()
+
+    def request_frame(self):
+        """Ask the compositor for a frame, if it renders on a scheduler."""
+        if self.parent is not None:
+            self.parent.request_frame()
+
+    @property
+    def mask(self):
+        """Get the transparency mask of the surface, used for overlay.
+
+        Computed once per content change.
+
+        Returns:
+            bytearray: 1 for cells that show what's below, see
+                FrameBuffer.transparent().
+
+        """
+        if self._mask is None:
+            self._mask = self.surface.transparent()
+        return self._mask
+
+    @property
+    def surface(self):
+        """Get the grid with all children drawn on it.
+
+        The flattened subtree is kept until something in it changes, so an
+        unchanged subtree is painted like a single box.
+
+        Returns:
+            FrameBuffer: Flattened grid, the grid itself without children.
+
+        """
+        if not self.children:
+            return self.grid
+        if not self._flat:
+            surface = self._surface
+            if surface is None:
+                surface = self._surface = self.grid.copy()
+            else:
+                surface.resize(self.grid.size).blit(self.grid)
+            for child in self.children:
+                surface.blit(child.surface, child.pos,
+                             mask=child.mask if child.overlay else None)
+                child.damaged = False
+            self._flat = True
+        return self._surface
+
+    def add(self, child, height='top'):
+        """Put a box inside this one.
+
+        The child is placed relative to this box, can align to it as a
+        target and is clipped to it. Aligning it to boxes outside, or boxes
+        outside aligning to it, raises ValueError on layout.
+
+        Args:
+            child (Box): Box to add, taken out of the object list or any other
+                container.
+            height (int, str, optional): Index in children, or 'top' or
+                'bottom'. Defaults to 'top'.
+
+        Returns:
+            Box: child.
+
+        Raises:
+            ValueError: If child is this box or contains it.
+
+        """
+        box = self
+        while box is not None:
+            if box is child:
+                raise ValueError('box cannot contain itself')
+            box = box.container
+
+        if child.container is not None:
+            child.container.remove(child)
+        elif child.parent is not None:
+            child.parent.unstack(child)
+        if height == 'top':
+            self.children.append(child)
+        elif height == 'bottom':
+            self.children.insert(0, child)
+        else:
+            self.children.insert(height, child)
+        child.container = self
+        child.invalidate_layout()
+        return child
+
+    def remove(self, child):
+        """Take a box out of this one.
+
+        Args:
+            child (Box): Box to remove.
+
+        Returns:
+            bool: False if it wasn't inside, or True if it was.
+
+        """
+        if child not in self.children:
+            return False
+        child.invalidate_layout()
+        self.children.remove(child)
+        child.container = None
+        return True
+
+    @property
+    def dirty(self):
+        """Check if the box needs an update() before compositing.
+
+        Plain boxes are drawn on directly, so they never do.
+
+        Returns:
+            bool: True if the grid is out of date.
+
+        """
+        return False
+
+    def update(self):
+        """Update the grid. Plain boxes have nothing to update."""
+
+    @property
+    def batching(self):
+        """Check if updates are deferred, by batch() here or on the compositor.
+
+        Returns:
+            bool: True inside a batch.
+
+        """
+        return self._batch > 0 or (
+            self.parent is not None and self.parent.batching)
+
+    @contextmanager
+    def batch(self):
+        """Defer updates until the with block ends.
+
+        Changes made inside only mark the box as out of date, and it is
+        updated once on the way out. Blocks can be nested, the outermost one
+        updates.
+
+        Yields:
+            Box: self.
+
+        """
+        self._batch += 1
+        try:
+            yield self
+        finally:
+            self._batch -= 1
+            if not self.batching:
+                self.refresh()
+
+    def request_update(self):
+        """Update the grid if out of date, now or when the batch it is in ends.
+
+        Setting something to the value it already has doesn't update.
+
+        """
+        if not self.batching and self.dirty:
+            self.update()
+
+    def refresh(self):
+        """Update the grid only if it is out of date.
+
+        Children are refreshed first.
+
+        Returns:
+            bool: True if the grid was updated.
+
+        """
+        for child in self.children:
+            child.refresh()
+        if self.dirty:
+            self.update()
+            return True
+        return False
+
+    def write_text(self, y, x, text, fg=None, bg=None):
+        """Write a str along a row of the grid.
+
+        The text is clipped to the grid once and written as a whole span.
+
+        Args:
+            y (int): Row.
+            x (int): Column of the first character, can be negative.
+            text (str): Characters to write, one per cell.
+            fg (str, optional): Foreground Color key. Defaults to None,
+                leaving colors unchanged.
+            bg (str, optional): Background Color key. Defaults to None,
+                leaving colors unchanged.
+
+        Returns:
+            int: Number of cells written.
+
+        """
+        n = self.grid.write(y, x, text, fg, bg)
+        if n:
+            self.touch()
+        return n
 
     def setsegment(self, pos=(0, 0), char=None, **kwargs):
         """Configure a single segment.
@@ -264,12 +702,9 @@ class Box:
         fg = kwargs.get('fg', None)  # foreground color
         bg = kwargs.get('bg', None)  # background color
 
-        if all((  # provided segment exists
-                pos[0] <= len(self.grid) - 1,
-                pos[1] <= len(self.grid[0]) - 1)
-               ):
-            self.grid[pos[0]][pos[1]].configure(
-                pos, char=char, fg=fg, bg=bg)
+        if self.grid.inside(pos[0], pos[1]):  # provided segment exists
+            self.grid.set(pos[0], pos[1], char, fg, bg)
+            self.touch()
 
     def from_splash(self, splash):
         """Set grid from a splash.
@@ -278,7 +713,7 @@ class Box:
             splash (list): 2d list of str or tuple of char, fg, bg.
 
         Returns:
-            list: New grid, 2d list of segments
+            FrameBuffer: New grid.
 
         """
         for y, line in enumerate(splash):
@@ -303,7 +738,7 @@ class Box:
                 Defaults to (0, 0).
 
         Returns:
-            list: New grid, 2d list of segments.
+            FrameBuffer: New grid.
 
         """
         # get corner coords (mostly for readability)
@@ -336,24 +771,82 @@ class Box:
             **bg (str): Background Color key. Defaults to 'default'.
 
         Returns:
-            list: New grid, 2d list of segments.
+            FrameBuffer: New grid.
 
         """
         fg = kwargs.get('fg', None)
         bg = kwargs.get('bg', None)
 
-        # first and second corner coords, mostly for readability
-        y1 = c1[0]
-        x1 = c1[1]
+        self.fill_rect(c1, c2, char, fg, bg)
 
-        y2 = c2[0]
-        x2 = c2[1]
+        return self.grid
 
-        for y in range(y1, y2 + 1):
-            for x in range(x1, x2 + 1):
-                self.setsegment((y, x), char=char, fg=fg, bg=bg)
+    def fill_rect(self, c1, c2, char=None, fg=None, bg=None):
+        """Fill a rectangular area, clipped to the box.
 
-        return self.grid
+        Args:
+            c1 (tuple): First corner (y, x).
+            c2 (tuple): Second corner (y, x), inclusive.
+            char (str, optional): Single character str. Defaults to None.
+            fg (str, optional): Foreground Color key. Defaults to None.
+            bg (str, optional): Background Color key. Defaults to None.
+
+        """
+        self.grid.fill_rect((c1[0], c1[1], c2[0] + 1, c2[1] + 1),
+                            char, fg, bg)
+        self.touch()
+
+    def hline(self, y, x1, x2, char=None, fg=None, bg=None):
+        """Draw a horizontal line, clipped to the box.
+
+        Args:
+            y (int): Row.
+            x1 (int): First column.
+            x2 (int): Last column, inclusive.
+            char (str, optional): Single character str. Defaults to None.
+            fg (str, optional): Foreground Color key. Defaults to None.
+            bg (str, optional): Background Color key. Defaults to None.
+
+        """
+        self.fill_rect((y, x1), (y, x2), char, fg, bg)
+
+    def vline(self, x, y1, y2, char=None, fg=None, bg=None):
+        """Draw a vertical line, clipped to the box.
+
+        Args:
+            x (int): Column.
+            y1 (int): First row.
+            y2 (int): Last row, inclusive.
+            char (str, optional): Single character str. Defaults to None.
+            fg (str, optional): Foreground Color key. Defaults to None.
+            bg (str, optional): Background Color key. Defaults to None.
+
+        """
+        self.fill_rect((y1, x), (y2, x), char, fg, bg)
+
+    def stroke_rect(self, c1, c2, char=None, fg=None, bg=None, stroke=1):
+        """Draw the edges of a rectangular area, clipped to the box.
+
+        Args:
+            c1 (tuple): First corner (y, x).
+            c2 (tuple): Second corner (y, x), inclusive.
+            char (str, optional): Single character str. Defaults to None.
+            fg (str, optional): Foreground Color key. Defaults to None.
+            bg (str, optional): Background Color key. Defaults to None.
+            stroke (int, optional): Thickness of the edges. Defaults to 1.
+
+        """
+        (y1, x1), (y2, x2) = c1, c2
+        if y2 - y1 < 2 * stroke or x2 - x1 < 2 * stroke:
+            # edges meet, nothing is left inside
+            self.fill_rect(c1, c2, char, fg, bg)
+            return
+        self.fill_rect((y1, x1), (y1 + stroke - 1, x2), char, fg, bg)
+        self.fill_rect((y2 - stroke + 1, x1), (y2, x2), char, fg, bg)
+        self.fill_rect((y1 + stroke, x1), (y2 - stroke, x1 + stroke - 1),
+                       char, fg, bg)
+        self.fill_rect((y1 + stroke, x2 - stroke + 1), (y2 - stroke, x2),
+                       char, fg, bg)
 
     def rectangle(self, c1=(0, 0), c2=(0, 0), char=None, **kwargs):
         """Replace a rectangular area of box.
@@ -383,17 +876,18 @@ class Box:
         inlay_fg = kwargs.get('inlay_fg', None)
         inlay_bg = kwargs.get('inlay_bg', None)
 
-        self.setarea(c1, c2, char, fg=fg, bg=bg)
-
         dy = c2[0] - c1[0]
-        dx = c2[1] - c1[0]
+        dx = c2[1] - c1[1]
 
-        # set area inside stroke to either blank or inlay
-        if stroke > 0 and all((dy > 2, dx > 2)):
+        if stroke > 0 and dy > 2 and dx > 2:
+            # stroke the edges, then set the area inside to blank or inlay
+            self.stroke_rect(c1, c2, char, fg, bg, stroke)
             s_pos = (c1[0] + stroke, c1[1] + stroke)
             s_size = (c2[0] - stroke, c2[1] - stroke)
             s_char = ' ' if not inlay else inlay
-            self.setarea(s_pos, s_size, s_char, fg=inlay_fg, bg=inlay_bg)
+            self.fill_rect(s_pos, s_size, s_char, inlay_fg, inlay_bg)
+        else:
+            self.fill_rect(c1, c2, char, fg, bg)
 
     def __str__(self):
         """Return str that summarizes box details.
@@ -11,15 +11,19 @@ TODO: EBox: edge-defined DBox (allows for multiple styles per edge,
 TODO: ETBox: edge-defined TBox
 """
 
+import atexit
 import os
-import sys
-from .segment import Segment
-from .box import Box
+import shutil
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from .encoder import Encoder
+from .framebuffer import FrameBuffer, intersect, merge_rects
+from .box import Box, resolve_layout
 from .dbox import DBox
+from .sink import StdoutSink
+from .stats import FrameStats
 from .tbox import TBox
 
-import re
-
 from colorama import init as fgama_init  # used to support ANSI in windows cmd
 
 # import logging
@@ -41,56 +45,244 @@ class Compositor:
 
     """
 
-    def __init__(self, size=(29, 120)):
+    def __init__(self, size=(29, 120), **kwargs):
         """Compositor __init__ method.
 
         Args:
             size (tuple, optional): (height, width) size. Controls size in
             terminal. Defaults to (29, 120).
+            **dchar (str): Single character to fill the background with.
+                Defaults to ' '.
+            **fg (str): Background fill Foreground Color key.
+                Defaults to 'default'.
+            **bg (str): Background fill Background Color key.
+                Defaults to 'default'.
+            **sink (object): Where frames are written, anything with a
+                write(bytes) method. Defaults to a StdoutSink.
+            **fullscreen (bool): Draw on the alternate screen with the cursor
+                hidden and frames wrapped in synchronized updates. The
+                terminal is restored by exit_screen(), on leaving a with
+                block or at exit. Ignored on windows. Defaults to False.
+            **rows (int): Rows of the terminal, used to tell if there is room
+                to park the cursor below the frame. Defaults to None, asking
+                the terminal on every frame.
 
         """
         self.size = size
-        # ordered list of objects, order determines render order
+        self.dchar = kwargs.get('dchar', ' ')
+        self.fg = kwargs.get('fg', 'default')
+        self.bg = kwargs.get('bg', 'default')
+        self._dependents = set()  # boxes aligned to the compositor
+        # ordered list of objects, order determines render order. Change it
+        # through place_object(), move() and removeobject()
         self.objectlist = []
-        self.grid = []
-        self.segments = []
+        self._zorder = []  # sorted z keys, parallel to objectlist
+        self._zkeys = {}  # box -> z key
+        self.names = {}  # name -> box, including boxes inside others
+        self.grid = None
+        self.blank = None  # background template copied over cleared areas
         self.populate()
-        self.blank = self.grid
+        # last frame written to the terminal, used to only emit changes
+        self.front = None
+        self.stale = True  # terminal contents unknown, repaint everything
+        # rect and stacking order each box was last painted with, used to
+        # find what needs recompositing
+        self.painted = {}
+        self.painted_order = []
+        self.full = True  # recomposite everything on the next composite
+        self.damaged = []  # rects recomposited since the last render
+        # windows consoles rely on colorama, which can't translate erase
+        self.encoder = Encoder(erase=os.name != 'nt')
+        self.sink = kwargs.get('sink', None) or StdoutSink()
+        self.fullscreen = kwargs.get('fullscreen', False) and os.name != 'nt'
+        self.encoder.sync = self.fullscreen
+        self.rows = kwargs.get('rows', None)
+        self.screen = False  # on the alternate screen
+        self.scheduler = None  # set by Scheduler
+        self.frames = 0  # frames rendered
+        self.observers = []  # called with FrameStats after each render
+        self.stats = None  # stats of the frame being made, if observed
+        self.statsbox = None  # box showing stats, see show_stats()
+        self.compositing = False
+        self._batch = 0  # depth of batch() blocks
+
+    def __enter__(self):
+        if self.fullscreen:
+            self.enter_screen()
+        return self
+
+    def __exit__(self, *exc):
+        self.exit_screen()
+        return False
+
+    def enter_screen(self):
+        """Switch to the alternate screen and hide the cursor.
+
+        Called by the first render in fullscreen mode. The terminal is
+        restored at exit if exit_screen() isn't called before.
+
+        """
+        if self.screen:
+            return
+        self.write(b"\033[?1049h\033[?25l")
+        self.screen = True
+        self.invalidate()
+        atexit.register(self.exit_screen)
+
+    def exit_screen(self):
+        """Leave the alternate screen and show the cursor again."""
+        if not self.screen:
+            return
+        self.screen = False
+        atexit.unregister(self.exit_screen)
+        # end an interrupted frame, if any, before restoring
+        self.write(b"\033[?2026l\033[0m\033[?25h\033[?1049l")
+
+    def request_frame(self):
+        """Request a frame from the scheduler, if there is one.
+
+        Requests made while compositing are ignored, they are about the frame
+        being made.
+
+        Returns:
+            asyncio.Future: Resolves once the frame is presented, or None
+                without a scheduler.
+
+        """
+        if self.scheduler is None or self.compositing:
+            return None
+        return self.scheduler.request()
+
+    @property
+    def batching(self):
+        """Check if box updates are deferred by batch().
+
+        Returns:
+            bool: True inside a batch.
 
-        self.overlay_match = re.compile("(\\033\[\d{4}\s\\033\[0m)|(\s)")
+        """
+        return self._batch > 0
+
+    @contextmanager
+    def batch(self):
+        """Defer updates of every box until the with block ends.
+
+        Boxes changed inside are only marked out of date, and each is
+        updated once on the way out. Use it when building or changing many
+        boxes at once.
+
+        Yields:
+            Compositor: self.
+
+        """
+        self._batch += 1
+        try:
+            yield self
+        finally:
+            self._batch -= 1
+            if not self._batch:
+                for obj in self.objectlist:
+                    if not obj.batching:
+                        obj.refresh()
 
     def populate(self):
-        """Populate grid with blank segments.
+        """Populate grid and background template with blank cells.
 
         Returns:
-            list: New grid, 2d list of segments.
+            FrameBuffer: New grid.
 
         """
-        for y in range(self.size[0]):
-            self.grid.append([])
-            for x in range(self.size[1]):
-                self.grid[y].append(Segment((y, x)))
-                self.segments.append(self.grid[y][x])
+        self.blank = FrameBuffer(self.size, self.dchar, self.fg, self.bg)
+        self.grid = self.blank.copy()
 
         return self.grid
 
+    def setbackground(self, dchar=None, fg=None, bg=None):
+        """Set the background fill shown where there are no boxes.
+
+        Args:
+            dchar (str, optional): Single character str. Defaults to None.
+            fg (str, optional): Foreground Color key. Defaults to None.
+            bg (str, optional): Background Color key. Defaults to None.
+
+        """
+        # validate before changing anything
+        blank = FrameBuffer(
+            self.size,
+            self.dchar if dchar is None else dchar,
+            self.fg if fg is None else fg,
+            self.bg if bg is None else bg)
+        self.blank = blank
+        if dchar is not None:
+            self.dchar = dchar
+        if fg is not None:
+            self.fg = fg
+        if bg is not None:
+            self.bg = bg
+        self.full = True
+        self.request_frame()
+
     def resize(self, newsize):
-        self.size = newsize
-        self.grid = []
-        self.segments = []
-        self.populate()
+        """Resize the compositor.
+
+        Forces a full repaint on the next render.
+
+        Args:
+            newsize (tuple): (height, width) size.
 
-    def clear(self):
-        """Configure all segments in grid to be blank.
+        """
+        self.size = newsize
+        # a full composite redraws the resized buffers anyway
+        self.blank.resize(newsize, self.dchar, self.fg, self.bg)
+        self.grid.resize(newsize, self.dchar, self.fg, self.bg)
+        self.full = True
+        self.invalidate()
+        for o in list(self._dependents):
+            o.invalidate_layout()
+        self.request_frame()
+
+    @property
+    def pos(self):
+        """Get position, for boxes aligned to the compositor.
 
         Returns:
-            list: Grid, 2d list of segments.
+            tuple: (0, 0), the compositor is the whole screen.
 
         """
-        for s in self.segments:
-            s.configure(pos=None, char=' ', fg='default', bg='default')
+        return (0, 0)
 
-        return self.grid
+    def layout(self):
+        """Resolve the positions of all boxes.
+
+        Positions are cached on each box, so only boxes that moved or
+        resized, and boxes aligned to them, are placed again.
+
+        Raises:
+            ValueError: If alignment targets form a cycle.
+
+        """
+        resolve_layout(self.objectlist)
+
+    def invalidate(self):
+        """Forget the last rendered frame so the next render repaints all.
+
+        Use this when something else has written to the terminal.
+
+        """
+        self.stale = True
+
+    def clear(self, rect=None):
+        """Reset cells in grid to the background by copying the template.
+
+        Args:
+            rect (tuple, optional): (y1, x1, y2, x2) area to clear, second
+                corner exclusive. Defaults to the whole grid.
+
+        Returns:
+            FrameBuffer: Grid.
+
+        """
+        return self.grid.blit(self.blank, clip=rect)
 
     def place_object(self, obj, height):
         """Place a box at a given height in the compositor.
@@ -100,51 +292,192 @@ class Compositor:
             height (int, str): int indicating specific location, str indicating
                 top, bottom, or above/below <boxname>.
 
-
         Raises:
             ValueError: If box name given doesn't correspond to any existing
-                box.
+                box, or obj's name is taken by another box.
 
         """
-        if height == 'top':
-            self.objectlist.append(obj)
-        elif height == 'bottom':
-            self.objectlist.insert(0, obj)
-        elif isinstance(height, int):
-            self.objectlist.insert(height, obj)
-        elif ' ' in height:
-            arg = height.split(' ')
-            # check if target argument exists and raise exception if not
-            if arg[1] not in self.objectlist:
-                raise ValueError('box name does not correspond to any in list')
-            # place object either above or below target
-            else:
-                # select target object
-                target = [o for o in self.objectlist if o.name == arg[1]][0]
-                if arg[0] == 'above':
-                    self.objectlist.insert(
-                        self.objectlist.index(target) + 1, obj)
-                elif arg[0] == 'below':
-                    self.objectlist.insert(
-                        self.objectlist.index(target) - 1, obj)
+        named = self.names.get(obj.name) is obj  # already indexed
+        self._index(obj)
+        try:
+            self._stack(obj, height)
+        except ValueError:
+            if not named:
+                self._unindex(obj)
+            raise
+        obj.parent = self
+        self.request_frame()
+
+    def move(self, obj, height):
+        """Move a placed box to another height.
+
+        Args:
+            obj (Box, str): Box or name of box to move.
+            height (int, str): int indicating specific location, str indicating
+                top, bottom, or above/below <boxname>.
+
+        Raises:
+            ValueError: If either box isn't in the object list.
+
+        """
+        obj = self.getobject(obj)
+        if obj not in self._zkeys:
+            raise ValueError('box is not in the object list')
+        key = self._zkeys[obj]
+        self.unstack(obj)
+        try:
+            self._stack(obj, height)
+        except ValueError:
+            self._insert(obj, key)
+            raise
+        self.request_frame()
+
+    def getobject(self, name):
+        """Get a box by name.
+
+        Args:
+            name (str, Box): Name of box. A box is returned as is.
+
+        Returns:
+            Box: Box with that name, or None.
+
+        """
+        if isinstance(name, str):
+            return self.names.get(name)
+        return name
 
     def removeobject(self, objname=None):
-        """Remove object by reference.
+        """Remove object by name or reference.
+
+        Boxes inside it go with it. Boxes aligned to it are no longer aligned
+        to anything, and it no longer aligns to anything outside it.
 
         Args:
-            objname (str): Name of box to remove. Defaults to None.
+            objname (str, Box): Name of box or box to remove. Defaults to None.
 
         Returns:
             bool: False if nothing was removed, or True if something was.
 
         """
-        if objname is None:
+        obj = self.getobject(objname)
+        if obj is None:
             return False
-        if objname not in self.objectlist:
+        if obj.container is not None:
+            obj.container.remove(obj)
+        elif not self.unstack(obj):
             return False  # instead of error because it's technically not there
+
+        # release the subtree: names, outside alignment links and caches
+        subtree = [obj]
+        for box in subtree:
+            subtree.extend(box.children)
+        inside = set(subtree)
+        for box in subtree:
+            self._unindex(box)
+            for d in list(box._dependents):
+                if d not in inside:
+                    if d.ytarget is box:
+                        d.ytarget = None
+                    if d.xtarget is box:
+                        d.xtarget = None
+            if box.ytarget not in inside:
+                box.ytarget = None
+            if box.xtarget not in inside:
+                box.xtarget = None
+            box._surface = None
+            box._flat = False
+            box._mask = None
+        obj.parent = None
+        self.request_frame()
+        return True
+
+    def unstack(self, obj):
+        """Take a box out of the object list, keeping its name and links.
+
+        Args:
+            obj (Box): Box to take out.
+
+        Returns:
+            bool: False if it wasn't in the list, or True if it was.
+
+        """
+        key = self._zkeys.pop(obj, None)
+        if key is None:
+            return False
+        i = bisect_left(self._zorder, key)
+        del self._zorder[i]
+        del self.objectlist[i]
+        self.request_frame()
+        return True
+
+    def _index(self, obj):
+        """Add a box to the name index."""
+        if self.names.get(obj.name, obj) is not obj:
+            raise ValueError("box name '{}' is already used".format(obj.name))
+        self.names[obj.name] = obj
+
+    def _unindex(self, obj):
+        """Remove a box from the name index."""
+        if self.names.get(obj.name) is obj:
+            del self.names[obj.name]
+
+    def _autoname(self, prefix):
+        """Make a box name that isn't used yet."""
+        n = len(self.names)
+        while '{}#{}'.format(prefix, n) in self.names:
+            n += 1
+        return '{}#{}'.format(prefix, n)
+
+    def _stack(self, obj, height):
+        """Insert a box in the object list at a height, see place_object()."""
+        order = self._zorder
+        if height == 'top':
+            key = order[-1] + 1 if order else 0.0
+        elif height == 'bottom':
+            key = order[0] - 1 if order else 0.0
+        elif isinstance(height, int):
+            i = max(0, min(len(order), height if height >= 0
+                           else len(order) + height))
+            key = self._between(i)
         else:
-            self.objectlist.remove(objname)
-            return True
+            where, _, name = height.partition(' ')
+            target = self.names.get(name)
+            if target is None or target not in self._zkeys:
+                raise ValueError('box name does not correspond to any in list')
+            i = bisect_left(order, self._zkeys[target])
+            if where == 'above':
+                key = self._between(i + 1)
+            elif where == 'below':
+                key = self._between(i)
+            else:
+                raise ValueError("height must be 'above <name>' or "
+                                 "'below <name>'")
+        self._insert(obj, key)
+
+    def _between(self, i):
+        """Get a z key that sorts between index i - 1 and i."""
+        order = self._zorder
+        if not order:
+            return 0.0
+        if i == 0:
+            return order[0] - 1
+        if i == len(order):
+            return order[-1] + 1
+        key = (order[i - 1] + order[i]) / 2
+        if not order[i - 1] < key < order[i]:
+            # out of precision, spread the keys out again
+            self._zorder[:] = [float(n) for n in range(len(order))]
+            for n, o in enumerate(self.objectlist):
+                self._zkeys[o] = float(n)
+            key = i - 0.5
+        return key
+
+    def _insert(self, obj, key):
+        """Insert a box in the object list by z key."""
+        i = bisect_right(self._zorder, key)
+        self._zorder.insert(i, key)
+        self.objectlist.insert(i, obj)
+        self._zkeys[obj] = key
 
     def makebox(self, **kwargs):
         """Make a Box and place it in the object list.
@@ -171,6 +504,8 @@ class Compositor:
             **xtalign (str): type of alignment to target horizontally
             **xsalign (str): type of alignment to self horizontally
             **height (str): height of object in objectlist, used for overlaps.
+            **container (Box): Box to put the new box inside, instead of the
+                object list. height is then its place among the children.
 
         Returns:
             Box: New Box.
@@ -189,9 +524,10 @@ class Compositor:
         xtalign = kwargs.get("xtalign", "center")
         xsalign = kwargs.get("xsalign", "center")
         height = kwargs.get("height", 'top')
+        container = kwargs.get("container", None)
 
         if name is None:
-            name = 'box#{}'.format(len(self.objectlist))
+            name = self._autoname('box')
 
         new = Box(
             self,
@@ -208,7 +544,11 @@ class Compositor:
             xtalign=xtalign,
             xsalign=xsalign)
 
-        self.place_object(new, height)
+        if container is None:
+            self.place_object(new, height)
+        else:
+            self._index(new)
+            container.add(new, height)
         return new
 
     def makedbox(self, **kwargs):
@@ -235,6 +575,8 @@ class Compositor:
             **xtalign (str): type of alignment to target horizontally
             **xsalign (str): type of alignment to self horizontally
             **height (str): height of object in objectlist, used for overlaps.
+            **container (Box): Box to put the new box inside, instead of the
+                object list. height is then its place among the children.
 
         Returns:
             DBox: New Dynamic Box.
@@ -257,9 +599,10 @@ class Compositor:
         xtalign = kwargs.get("xtalign", "center")
         xsalign = kwargs.get("xsalign", "center")
         height = kwargs.get("height", 'top')
+        container = kwargs.get("container", None)
 
         if name is None:
-            name = 'dbox#{}'.format(len(self.objectlist))
+            name = self._autoname('dbox')
 
         new = DBox(self,
                    name=name,
@@ -278,7 +621,11 @@ class Compositor:
                    xtalign=xtalign,
                    xsalign=xsalign)
 
-        self.place_object(new, height)
+        if container is None:
+            self.place_object(new, height)
+        else:
+            self._index(new)
+            container.add(new, height)
         return new
 
     def maketbox(self, **kwargs):
@@ -310,6 +657,8 @@ class Compositor:
             **xtalign (str): type of alignment to target horizontally
             **xsalign (str): type of alignment to self horizontally
             **height (str): height of object in objectlist, used for overlaps.
+            **container (Box): Box to put the new box inside, instead of the
+                object list. height is then its place among the children.
 
         Returns:
             TBox: New Text Box.
@@ -333,9 +682,10 @@ class Compositor:
         xtalign = kwargs.get("xtalign", "center")
         xsalign = kwargs.get("xsalign", "center")
         height = kwargs.get("height", 'top')
+        container = kwargs.get("container", None)
 
         if name is None:
-            name = 'tbox#{}'.format(len(self.objectlist))
+            name = self._autoname('tbox')
 
         new = TBox(self,
                    name=name,
@@ -356,7 +706,11 @@ class Compositor:
                    xtalign=xtalign,
                    xsalign=xsalign)
 
-        self.place_object(new, height)
+        if container is None:
+            self.place_object(new, height)
+        else:
+            self._index(new)
+            container.add(new, height)
         return new
 
     def setsegment(self, pos=(0, 0), char=None, fg=None, bg=None):
@@ -371,79 +725,398 @@ class Compositor:
                 Defaults to None.
 
         """
-        self.grid[pos[0]][pos[1]].configure(pos, char, fg=fg, bg=bg)
+        self.grid.set(pos[0], pos[1], char, fg, bg)
 
-    def to_grid(self, obj):
+    def to_grid(self, obj, clip=None):
         """Paint box to grid.
 
         Args:
             obj (Box): Any boxtype.
+            clip (tuple, optional): (y1, x1, y2, x2) area of the grid to paint
+                in, second corner exclusive. Defaults to the whole grid.
 
         Returns:
-            list: Grid, 2d list of segments.
-
-        """
-        pos = obj.pos
-        size = obj.size
-        splash = obj.grid
-
-        y1 = pos[0]
-        x1 = pos[1]
-        # get second corner coords
-        y2 = pos[0] + size[0] - 1
-        x2 = pos[1] + size[1] - 1
-
-        for y in range(y1, y2 + 1):
-            for x in range(x1, x2 + 1):
-                seg = splash[y - y1][x - x1]
-                if obj.overlay:
-                    if self.overlay_match.match(seg.char):
-                        self.setsegment((y, x), self.grid[y][x].char,
-                                        self.grid[y][x].fg, seg.bg)
-                    else:
-                        self.setsegment((y, x), seg.char, seg.fg, seg.bg)
-                else:
-                    self.setsegment((y, x), seg.char, seg.fg, seg.bg)
+            FrameBuffer: Grid.
 
-        return self.grid
+        """
+        return self.grid.blit(obj.grid, obj.pos, clip,
+                              obj.mask if obj.overlay else None)
 
-    def composite(self):
-        """Composite all objects to grid and render to stdout."""
-        self.clear()
+    def paint(self, obj, spans):
+        """Paint spans of a box to grid.
+
+        Args:
+            obj (Box): Any boxtype.
+            spans (list): (y, x1, x2) spans in grid coordinates, x2
+                exclusive. Must lie inside both the grid and the box.
+
+        Returns:
+            FrameBuffer: Grid.
+
+        """
+        src = obj.surface
+        grid = self.grid
+        y0, x0 = obj.pos
+        mask = obj.mask if obj.overlay else None
+        sw = src.size[1]
+        gw = grid.size[1]
+
+        for y, x1, x2 in spans:
+            grid.copy_span(src, (y - y0) * sw + x1 - x0, y * gw + x1,
+                           x2 - x1, mask)
+
+        return grid
+
+    def visible(self, rects):
+        """Find the parts of boxes that aren't hidden by opaque boxes above.
+
+        Boxes are visited top to bottom while keeping a map of cells already
+        covered by boxes that aren't overlays. Boxes with nothing left to show
+        are left out.
+
+        Args:
+            rects (list): Non-overlapping (y1, x1, y2, x2) rects to look in.
+
+        Returns:
+            list: (box, spans) pairs bottom to top, spans as (y, x1, x2) in
+                grid coordinates, x2 exclusive.
+
+        """
+        width = self.size[1]
+        covered = bytearray(self.size[0] * width)
+        ones = b'\x01' * width
+        found = []
+
+        for o in reversed(self.objectlist):
+            box = self.rect(o)
+            spans = []
+            for rect in rects:
+                area = intersect(box, rect)
+                if area is None:
+                    continue
+                y1, x1, y2, x2 = area
+                for y in range(y1, y2):
+                    i = y * width
+                    start = i + x1
+                    end = i + x2
+                    # runs of uncovered cells
+                    while start < end:
+                        start = covered.find(0, start, end)
+                        if start < 0:
+                            break
+                        stop = covered.find(1, start, end)
+                        if stop < 0:
+                            stop = end
+                        spans.append((y, start - i, stop - i))
+                        start = stop
+                    if not o.overlay:
+                        covered[i + x1:i + x2] = ones[:x2 - x1]
+            if spans:
+                found.append((o, spans))
+
+        found.reverse()
+        return found
+
+    @staticmethod
+    def rect(obj):
+        """Get the area a box covers.
+
+        Args:
+            obj (Box): Any boxtype.
+
+        Returns:
+            tuple: (y1, x1, y2, x2) area, second corner exclusive.
+
+        """
+        y, x = obj.pos
+        return (y, x, y + obj.size[0], x + obj.size[1])
 
+    def damage(self):
+        """Find the areas of the grid that need recompositing.
+
+        A box damages the area it covers when it is new, when its content
+        changed or when its stacking order changed, and both its old and new
+        area when it moved or resized. Removed boxes damage their old area.
+
+        Returns:
+            list: Non-overlapping (y1, x1, y2, x2) rects, clipped to grid.
+
+        """
+        screen = (0, 0) + self.size
+        rects = []
+
+        # boxes whose order relative to other still present boxes changed
+        present = set(self.objectlist)
+        before = [o for o in self.painted_order if o in present]
+        after = [o for o in self.objectlist if o in self.painted]
+        restacked = {a for a, b in zip(after, before) if a is not b}
+
+        painted = {}
         for o in self.objectlist:
-            if isinstance(o, DBox):
-                o.update()
-            self.to_grid(o)
+            rect = self.rect(o)
+            old = self.painted.get(o)
+            if old != rect:
+                if old is not None:
+                    rects.append(old)
+                rects.append(rect)
+            elif o.damaged or o in restacked:
+                rects.append(rect)
+            o.damaged = False
+            painted[o] = rect
+
+        for o, old in self.painted.items():
+            if o not in present:
+                rects.append(old)
+
+        self.painted = painted
+        self.painted_order = list(self.objectlist)
+
+        if self.full:
+            self.full = False
+            return [screen]
+
+        rects = [intersect(r, screen) for r in rects]
+        return merge_rects([r for r in rects if r is not None])
 
+    def composite(self):
+        """Composite all objects to grid and render to the sink."""
+        self.compose()
         self.render()
 
-    def rout(self, grid):
+    def compose(self):
+        """Composite all objects to grid without rendering.
+
+        Only the areas returned by damage() are cleared and repainted, and
+        only the parts of boxes in them that aren't covered by opaque boxes.
+        They are added to damaged until the next render.
+
+        """
+        stats = self.stats
+        if stats is None and self.observers:
+            stats = self.stats = FrameStats(self.frames + 1)
+        if stats is not None:
+            stats.start()
+
+        self.compositing = True
+        try:
+            for o in self.objectlist:
+                o.refresh()
+            if stats is not None:
+                stats.lap('update')
+            self.layout()
+            if stats is not None:
+                stats.lap('layout')
+
+            damaged = self.damage()
+            if stats is not None:
+                stats.lap('damage')
+            for rect in damaged:
+                self.clear(rect)
+            if stats is not None:
+                stats.lap('clear')
+                stats.cells += sum((r[2] - r[0]) * (r[3] - r[1])
+                                   for r in damaged)
+
+            painted = 0
+            for o, spans in self.visible(damaged):
+                self.paint(o, spans)
+                painted += 1
+                if stats is not None:
+                    stats.cells += sum(x2 - x1 for y, x1, x2 in spans)
+            if stats is not None:
+                stats.lap('blit')
+                stats.boxes += painted
+                stats.skipped += len(self.objectlist) - painted
+            self.damaged = merge_rects(self.damaged + damaged)
+        finally:
+            self.compositing = False
+
+    def rout(self, grid, rects=None):
         """Render a given grid.
 
+        Only cells that differ from the last rendered frame are encoded, each
+        run of changes preceded by a cursor positioning escape, and written
+        with a single write. The first frame, or any frame after a resize or
+        invalidate(), clears the screen and is written in full.
+
+        Args:
+            grid (FrameBuffer): Grid to render.
+            rects (list, optional): Non-overlapping (y1, x1, y2, x2) rects
+                that may have changed since the last render. Defaults to the
+                whole grid.
+
+        """
+        if self.fullscreen and not self.screen:
+            self.enter_screen()
+        stats = self.stats
+        if stats is not None:
+            stats.start()
+        front = self.front
+
+        if self.stale or front is None or front.size != grid.size:
+            clear = True
+            spans = [(y, 0, grid.size[1]) for y in range(grid.size[0])]
+            rects = None
+        else:
+            clear = False
+            spans = grid.diff(front, rects)
+
+        # keep the last frame in the same buffer from frame to frame
+        if front is None:
+            self.front = grid.copy()
+        elif rects is None:
+            front.resize(grid.size).blit(grid)
+        else:
+            for rect in rects:
+                front.blit(grid, clip=rect)
+        self.stale = False
+        data = self.encoder.encode(grid, spans, clear, self.parks(grid))
+        if stats is not None:
+            stats.lap('encode')
+        self.write(data)
+        if stats is not None:
+            stats.lap('write')
+            stats.bytes += len(data)
+
+    def parks(self, grid):
+        """Check if the cursor can be parked below a rendered grid.
+
+        Never in fullscreen mode, where the hidden cursor stays on the
+        frame. Otherwise only if the terminal has a row below the grid, or
+        its size is unknown.
+
         Args:
-            grid (list): 2d list of segments.
+            grid (FrameBuffer): Grid to render.
+
+        Returns:
+            bool: True if there is room below the grid.
 
         """
-        os.system('cls' if os.name == 'nt' else 'clear')
-        output = ""
-        for y, line in enumerate(grid):
-            for x, c in enumerate(line):
-                output += str(c)
+        if self.fullscreen:
+            return False
+        rows = self.rows
+        if rows is None:
+            rows = shutil.get_terminal_size((0, 0)).lines
+        return rows <= 0 or grid.size[0] < rows
 
-                if x >= self.size[1] - 1 and y < self.size[0]:
-                    output += "\n"
+    def write(self, data):
+        """Write encoded output to the sink.
 
-        sys.stdout.write(output)
-        sys.stdout.flush()
+        Args:
+            data (bytes): Encoded output.
+
+        """
+        self.sink.write(data)
 
     def render(self):
         """Render compositor grid.
 
-        Wrapper for rout().
+        Wrapper for rout(), only checks the areas that were recomposited.
 
         """
-        self.rout(self.grid)
+        self.rout(self.grid, self.damaged)
+        self.damaged = []
+        self.frames += 1
+
+        stats = self.stats
+        if stats is not None:
+            self.stats = None
+            # changes observers make show on the next frame, they don't
+            # request one
+            self.compositing = True
+            try:
+                for callback in list(self.observers):
+                    callback(stats)
+            finally:
+                self.compositing = False
+
+    def observe(self, callback):
+        """Call a function with the FrameStats of every rendered frame.
+
+        Frames are only measured while there are observers.
+
+        Args:
+            callback (callable): Called with a FrameStats after each render.
+
+        """
+        self.observers.append(callback)
+
+    def unobserve(self, callback):
+        """Stop calling a function after each render.
+
+        Args:
+            callback (callable): Function given to observe().
+
+        Returns:
+            bool: False if it wasn't observing, or True if it was.
+
+        """
+        if callback not in self.observers:
+            return False
+        self.observers.remove(callback)
+        return True
+
+    def show_stats(self, show=True):
+        """Show the stats of the last frame in the top right corner.
+
+        The box grows to fit the stats, up to the size of the compositor,
+        and doesn't shrink back so it doesn't jump around from frame to
+        frame.
+
+        Args:
+            show (bool, optional): Show or hide the stats box.
+                Defaults to True.
+
+        """
+        if show and self.statsbox is None:
+            self.statsbox = self.maketbox(
+                name=self._autoname('stats'),
+                size=self._statsbox_size(str(FrameStats())),
+                fg='black',
+                bg='white',
+                ytarget=self,
+                ytalign='top',
+                ysalign='top',
+                xtarget=self,
+                xtalign='right',
+                xsalign='aright')
+            self.observe(self._update_statsbox)
+        elif not show and self.statsbox is not None:
+            self.unobserve(self._update_statsbox)
+            self.removeobject(self.statsbox)
+            self.statsbox = None
+
+    def _update_statsbox(self, stats):
+        """Observer writing frame stats to the stats box."""
+        text = str(stats)
+        size = self._statsbox_size(text)
+        size = (max(size[0], self.statsbox.size[0]),
+                max(size[1], self.statsbox.size[1]))
+        if size != self.statsbox.size:
+            self.statsbox.resize(size)
+        self.statsbox.text = text
+
+    def _statsbox_size(self, text):
+        """Get the size of a stats box fitting text, within the compositor."""
+        lines = text.split('\n')
+        return (min(len(lines), self.size[0]),
+                min(max(len(line) for line in lines), self.size[1]))
+
+    def render_to_string(self, color=True):
+        """Composite and get the whole frame as a str instead of writing it.
+
+        Nothing is written to the sink, what changed still is on the next
+        render.
+
+        Args:
+            color (bool, optional): Include color escapes. Defaults to True.
+
+        Returns:
+            str: Rows of the frame separated by newlines.
+
+        """
+        self.compose()
+        return self.grid.to_string(color)
 
     def debug_render(self, grid):
         """Render given grid.
@@ -451,7 +1124,7 @@ class Compositor:
         Wrapper for rout() for debug purposes.
 
         Args:
-            grid (list): 2d list of segments
+            grid (FrameBuffer): Grid to render.
 
         """
         self.rout(self.grid)
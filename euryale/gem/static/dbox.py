@@ -4,8 +4,53 @@ Allows definition of points which are used to dynamically draw a box using
 box drawing characters of customizable style. Allows for splits, etc.
 
 """
+from bisect import bisect_left, bisect_right, insort
 from .box import Box
 
+# neighbour bits of a point
+_LEFT = 1
+_UP = 2
+_RIGHT = 4
+_DOWN = 8
+
+# neighbour bits -> index of junction glyph in a style str
+_JUNCTION_INDEX = {
+    _RIGHT | _DOWN: 2,
+    _DOWN | _LEFT: 3,
+    _UP | _RIGHT: 4,
+    _UP | _LEFT: 5,
+    _UP | _RIGHT | _DOWN: 6,
+    _LEFT | _UP | _DOWN: 7,
+    _LEFT | _RIGHT | _DOWN: 8,
+    _LEFT | _UP | _RIGHT: 9,
+    _LEFT | _UP | _RIGHT | _DOWN: 10,
+    _UP | _DOWN: 1,
+    _LEFT | _RIGHT: 0
+}
+
+_junctions = {}  # style -> junction table cache
+
+
+def junctions(style):
+    """Get the junction glyph table of a style.
+
+    Args:
+        style (str): Style value.
+
+    Returns:
+        tuple: Glyph for every combination of neighbour bits, None where a
+            point doesn't form a junction.
+
+    """
+    try:
+        return _junctions[style]
+    except KeyError:
+        table = tuple(style[_JUNCTION_INDEX[bits]]
+                      if bits in _JUNCTION_INDEX else None
+                      for bits in range(16))
+        _junctions[style] = table
+        return table
+
 
 class DBox(Box):
     """Dynamic box.
@@ -112,10 +157,16 @@ class DBox(Box):
             xsalign=xsalign
         )
 
-        if points is None:
-            self.points = []
-        else:
-            self.points = [p for p in points]
+        self._dirty = True  # grid needs rasterizing
+        self._fg = None
+        self._bg = None
+
+        # points, plus x of points by row and y of points by column, sorted
+        self._points = []
+        self._rows = {}
+        self._cols = {}
+        if points is not None:
+            self.points = points
 
         self._style = self.styles['default']
         self.style = (style, True)
@@ -130,7 +181,7 @@ class DBox(Box):
             self.default_points()
 
         if len(self.points) > 0:
-            self.update()
+            self.request_update()
 
     @property
     def fg(self):
@@ -152,16 +203,18 @@ class DBox(Box):
             silent = False
 
         try:
-            self._fg = self.fgs[fg]
+            fg = self.fgs[fg]
         except KeyError:
-            if fg in self.fgs.values():
-                self._fg = fg
-            else:
+            if fg not in self.fgs.values():
                 raise ValueError("argument '{}' is not supported fg.".format(
                     fg))
 
+        if fg != self._fg:
+            self._fg = fg
+            self.mark_dirty()
+
         if not silent:
-            self.update()
+            self.request_update()
 
         return self.fg
 
@@ -185,19 +238,46 @@ class DBox(Box):
             silent = False
 
         try:
-            self._bg = self.bgs[bg]
+            bg = self.bgs[bg]
         except KeyError:
-            if bg in self.bgs.values():
-                self._bg = bg
-            else:
+            if bg not in self.bgs.values():
                 raise ValueError("argument '{}' is not supported bg.".format(
                     bg))
 
+        if bg != self._bg:
+            self._bg = bg
+            self.mark_dirty()
+
         if not silent:
-            self.update()
+            self.request_update()
 
         return self.bg
 
+    @property
+    def points(self):
+        """Get the list of points. Set a new list of points without updating.
+
+        Returns:
+            list: (y, x) tuples.
+
+        """
+        return self._points
+
+    @points.setter
+    def points(self, points):
+        self._points = []
+        self._rows = {}
+        self._cols = {}
+        for p in points:
+            self._index(p)
+        self.mark_dirty()
+
+    def _index(self, pos):
+        """Add a point to the points list and indexes."""
+        self._points.append(pos)
+        insort(self._rows.setdefault(pos[0], []), pos[1])
+        insort(self._cols.setdefault(pos[1], []), pos[0])
+
     def default_points(self):
         """Add default points to the dbox.
 
@@ -217,10 +297,8 @@ class DBox(Box):
         Args:
             newsize (tuple): (height, width) size.
         """
-        self.grid = []
-        self.segments = []
-        self.size = newsize
-        self.populate()
+        super().resize(newsize)
+        self.mark_dirty()
 
         if rm_oldpoints:
             self.points = []
@@ -232,7 +310,7 @@ class DBox(Box):
         if defaultpoints:
             self.default_points()
 
-        self.update()
+        self.request_update()
 
     def addpoint(self, pos=(0, 0), silent=False):
         """Add a point to box.
@@ -251,9 +329,10 @@ class DBox(Box):
         if len(pos) < 2:
             raise ValueError('too few coordinates given')
 
-        self.points.append(pos)
+        self._index(pos)
+        self.mark_dirty()
         if not silent:
-            self.update()
+            self.request_update()
 
     def addpoints(self, *args, **kwargs):
         """Add multiple points.
@@ -265,10 +344,10 @@ class DBox(Box):
         """
         silent = kwargs.get("silent", False)
         for i in args:
-            if i not in self.points:
+            if i[1] not in self._rows.get(i[0], ()):
                 self.addpoint(i, True)
         if not silent:
-            self.update()
+            self.request_update()
 
     def removepoint(self, pos=(0, 0), silent=False):
         """Remove a point, selected by coordinates.
@@ -287,11 +366,13 @@ class DBox(Box):
         if len(pos) < 2:
             raise ValueError('too few coordinates given')
 
-        for i, p in enumerate([p for p in self.points]):
-            if p == pos:
-                self.points.pop(i)
+        while pos in self._points:
+            self._points.remove(pos)
+            self._rows[pos[0]].remove(pos[1])
+            self._cols[pos[1]].remove(pos[0])
+            self.mark_dirty()
         if not silent:
-            self.update()
+            self.request_update()
 
     def removepoints(self, *args):
         """Remove multiple points.
@@ -302,7 +383,7 @@ class DBox(Box):
         """
         for i in args:
             self.removepoint(i, True)
-        self.update()
+        self.request_update()
 
     @property
     def style(self):
@@ -324,15 +405,17 @@ class DBox(Box):
             silent = False
 
         try:
-            self._style = self.styles[style]
+            style = self.styles[style]
         except KeyError:
-            if style in self.styles.values():
-                self._style = style
-            else:
+            if style not in self.styles.values():
                 raise ValueError('argument is not supported style.')
 
+        if style != self._style:
+            self._style = style
+            self.mark_dirty()
+
         if not silent:
-            self.update()
+            self.request_update()
 
     def configure(self, pos=None, **kwargs):
         """Configure DBox.
@@ -366,92 +449,68 @@ class DBox(Box):
         self.style = (style, True)
         self.fg = (fg, True)
         self.bg = (bg, True)
-        self.update()
+        self.request_update()
 
         return True
 
+    def mark_dirty(self):
+        """Mark the grid as out of date and ask for a frame."""
+        self._dirty = True
+        self.request_frame()
+
+    @property
+    def dirty(self):
+        """Check if anything the drawn box depends on changed since update().
+
+        Returns:
+            bool: True if the grid is out of date.
+
+        """
+        return self._dirty
+
     def update(self):
-        """Update drawn boxes."""
-        def isint(obj):
-            """Check if obj is int.
-
-            Helper function.
-
-            Args:
-                obj (object): An object
-
-            Returns:
-                bool: True if obj is int else False
-
-            """
-            return True if not isinstance(obj, bool) else False
-
-        self.setarea((0, 0), self.size, char=' ', fg=self.fg, bg=self.bg)
-
-        for point in self.points:
-            y = point[0]
-            x = point[1]
-
-            try:
-                nlx = max(
-                    [p[1] for p in self.points if p[0] == y and p[1] < x])
-            except ValueError:
-                nlx = False
-            try:
-                nuy = max(
-                    [p[0] for p in self.points if p[1] == x and p[0] < y])
-            except ValueError:
-                nuy = False
-            try:
-                nrx = min(
-                    [p[1] for p in self.points if p[0] == y and p[1] > x])
-            except ValueError:
-                nrx = False
-            try:
-                ndy = min(
-                    [p[0] for p in self.points if p[1] == x and p[0] > y])
-            except ValueError:
-                ndy = False
-
-            # set character for vertex and set area to next verticies
-            count = 0
-            selector = {
-                1100: self.style[2],
-                1001: self.style[3],
-                110: self.style[4],
-                11: self.style[5],
-                1110: self.style[6],
-                1011: self.style[7],
-                1101: self.style[8],
-                111: self.style[9],
-                1111: self.style[10],
-                1010: self.style[1],
-                101: self.style[0]
-            }
-
-            if isint(nlx):
-                self.setarea(
-                    (y, nlx + 1), (y, x - 1), self.style[0], fg=self.fg,
-                    bg=self.bg)
-                count += 1
-            if isint(nuy):
-                self.setarea(
-                    (nuy + 1, x), (y - 1, x), self.style[1], fg=self.fg,
-                    bg=self.bg)
-                count += 10
-            if isint(nrx):
-                self.setarea(
-                    (y, x + 1), (y, nrx - 1), self.style[0], fg=self.fg,
-                    bg=self.bg)
-                count += 100
-            if isint(ndy):
-                self.setarea(
-                    (y + 1, x), (ndy - 1, x), self.style[1], fg=self.fg,
-                    bg=self.bg)
-                count += 1000
-
-            try:
-                self.setsegment((y, x), selector[count], fg=self.fg,
-                                bg=self.bg)
-            except KeyError:
-                continue
+        """Update drawn boxes.
+
+        Each point is joined to its nearest neighbour right and below, found
+        by bisecting the row and column indexes, and drawn with the junction
+        glyph for its set of neighbours.
+
+        """
+        self.fill_rect((0, 0), self.size, ' ', self.fg, self.bg)
+
+        table = junctions(self.style)
+        rows = self._rows
+        cols = self._cols
+
+        # rows in order, so horizontal lines win where lines cross
+        for y, row in sorted(rows.items()):
+            for i, x in enumerate(row):
+                if i > 0 and row[i - 1] == x:
+                    continue  # duplicate point
+                col = cols[x]
+                j = bisect_left(col, y)
+
+                bits = 0
+                if i > 0:
+                    bits |= _LEFT
+                if j > 0:
+                    bits |= _UP
+
+                n = bisect_right(row, x)
+                if n < len(row):
+                    bits |= _RIGHT
+                    self.hline(y, x + 1, row[n] - 1, self.style[0],
+                               self.fg, self.bg)
+
+                n = bisect_right(col, y)
+                if n < len(col):
+                    bits |= _DOWN
+                    self.vline(x, y + 1, col[n] - 1, self.style[1],
+                               self.fg, self.bg)
+
+                # set character for vertex
+                if table[bits] is not None:
+                    self.setsegment((y, x), table[bits], fg=self.fg,
+                                    bg=self.bg)
+
+        self._dirty = False
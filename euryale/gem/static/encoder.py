@@ -0,0 +1,156 @@
+"""Encoder.
+
+Turns changed spans of a frame buffer into the escape sequences that draw
+them, keeping the output as small as possible.
+"""
+
+from .framebuffer import FG_CODES, BG_CODES
+from .segment import SGR, RESET
+
+# escape for a single fg or bg parameter
+_PARAM = {v: "\033[{}m".format(v)
+          for v in set(FG_CODES.values()) | set(BG_CODES.values())}
+
+_BLANK = ord(' ')
+
+# synchronized update, mode 2026
+SYNC_BEGIN = "\033[?2026h"
+SYNC_END = "\033[?2026l"
+
+
+class Encoder:
+    """Encoder.
+
+    Emits attribute changes only when fg or bg differ from the last written
+    cell, and collapses runs of blanks into erase sequences. A whole frame is
+    returned as a single bytes object.
+
+    """
+
+    def __init__(self, erase=True, min_erase=6, gap=3, encoding='utf-8',
+                 sync=False):
+        """Encoder __init__ method.
+
+        Args:
+            erase (bool, optional): Use erase sequences for runs of blanks.
+                Defaults to True.
+            min_erase (int, optional): Shortest run of blanks to erase
+                instead of writing. Defaults to 6.
+            gap (int, optional): Unchanged cells between two spans on a row
+                that are rewritten instead of moving the cursor.
+                Defaults to 3.
+            encoding (str, optional): Output encoding. Defaults to 'utf-8'.
+            sync (bool, optional): Wrap frames in synchronized update marks,
+                so the terminal shows them all at once. Terminals without
+                support ignore them. Defaults to False.
+
+        """
+        self.erase = erase
+        self.min_erase = min_erase
+        self.gap = gap
+        self.encoding = encoding
+        self.sync = sync
+
+    def merge(self, spans):
+        """Join spans on the same row separated by small gaps.
+
+        Args:
+            spans (list): (y, x1, x2) spans sorted by position.
+
+        Returns:
+            list: Merged (y, x1, x2) spans.
+
+        """
+        merged = []
+        for span in spans:
+            if merged:
+                y, x1, x2 = merged[-1]
+                if span[0] == y and span[1] - x2 <= self.gap:
+                    merged[-1] = (y, x1, span[2])
+                    continue
+            merged.append(span)
+        return merged
+
+    def encode(self, grid, spans, clear=False, park=True):
+        """Encode spans of a grid.
+
+        Args:
+            grid (FrameBuffer): Grid to encode cells from.
+            spans (list): (y, x1, x2) spans of cells to draw, x2 exclusive.
+            clear (bool, optional): Clear the screen first. Defaults to False.
+            park (bool, optional): Move the cursor to the row below the frame
+                and erase from there. Only pass True if the terminal has that
+                row, it would erase the last row of the frame otherwise.
+                Defaults to True.
+
+        Returns:
+            bytes: Encoded frame, empty if there is nothing to draw.
+
+        """
+        if not spans and not clear:
+            return b''
+
+        output = []
+        if self.sync:
+            output.append(SYNC_BEGIN)
+        if clear:
+            output.append("\033[H\033[2J")
+
+        width = grid.size[1]
+        fg = bg = None  # attributes of the terminal, None if unknown
+        cursor = None  # known cursor position, None if unknown
+
+        for y, x1, x2 in self.merge(spans):
+            if cursor != (y, x1):
+                output.append("\033[{};{}H".format(y + 1, x1 + 1))
+            chars, fgs, bgs = grid.row(y, x1, x2)
+            # the cursor doesn't advance past the last column
+            cursor = (y, x2) if x2 < width else None
+            n = x2 - x1
+            i = 0
+            while i < n:
+                c = chars[i]
+                b = bgs[i]
+
+                if c == _BLANK and self.erase:
+                    j = i + 1
+                    while j < n and chars[j] == _BLANK and bgs[j] == b:
+                        j += 1
+                    to_edge = x1 + j == width
+                    if j - i >= self.min_erase or (to_edge and j - i > 3):
+                        if b != bg:
+                            output.append(_PARAM[b])
+                            bg = b
+                        if to_edge:
+                            # erase to end of line
+                            output.append("\033[K")
+                            cursor = None
+                        elif j == n:
+                            output.append("\033[{}X".format(j - i))
+                            cursor = None
+                        else:
+                            # erase, then step over the erased cells
+                            output.append("\033[{0}X\033[{0}C".format(j - i))
+                        i = j
+                        continue
+
+                f = fgs[i]
+                if f != fg and b != bg:
+                    output.append(SGR[f, b])
+                elif f != fg:
+                    output.append(_PARAM[f])
+                elif b != bg:
+                    output.append(_PARAM[b])
+                fg = f
+                bg = b
+                output.append(chr(c))
+                i += 1
+
+        output.append(RESET)
+        if park:
+            # park the cursor below the frame and clear anything written there
+            output.append("\033[{};1H\033[J".format(grid.size[0] + 1))
+        if self.sync:
+            output.append(SYNC_END)
+
+        return "".join(output).encode(self.encoding)
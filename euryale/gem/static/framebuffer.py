@@ -0,0 +1,674 @@
+"""Frame Buffer.
+
+Compact storage for a grid of ANSI-decorated characters. Characters and colors
+are kept in parallel typed arrays indexed by y * width + x instead of one
+Segment object per cell, so clearing, copying and comparing become slice
+operations. NumPy arrays are used when NumPy is installed.
+"""
+
+import sys
+from array import array
+
+from .segment import Segment, FGS, BGS, SGR, RESET
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the array module does the job too
+    np = None
+
+
+def _codes(names):
+    """Build a lookup of color key, str value or int value to int value."""
+    codes = {}
+    for key, value in names.items():
+        codes[key] = codes[value] = codes[int(value)] = int(value)
+    return codes
+
+
+# color key or value -> int SGR parameter
+FG_CODES = _codes(FGS)
+BG_CODES = _codes(BGS)
+
+# codepoints of whitespace, which overlay boxes show through
+_SPACES = [c for c in range(0x3001) if chr(c).isspace()]
+_SPACE_SET = frozenset(_SPACES)
+
+# typecodes for codepoints and colors
+_CHAR_TYPE = 'I'
+_COLOR_TYPE = 'B'
+
+# codec turning str into native order 4 byte codepoints
+_UTF32 = 'utf-32-le' if sys.byteorder == 'little' else 'utf-32-be'
+
+
+def _alloc(typecode, value, length):
+    """Allocate a typed buffer of given length filled with value."""
+    if np is not None:
+        return np.full(length, value,
+                       dtype=np.uint32 if typecode == _CHAR_TYPE else np.uint8)
+    return array(typecode, [value]) * length
+
+
+def _codepoints(text):
+    """Convert a str to a typed buffer of codepoints."""
+    data = text.encode(_UTF32)
+    if np is not None:
+        return np.frombuffer(data, dtype=np.uint32)
+    return array(_CHAR_TYPE, data)
+
+
+def _same(a, b):
+    """Check two buffer slices for equality."""
+    if np is not None:
+        return np.array_equal(a, b)
+    return a == b
+
+
+def intersect(a, b):
+    """Intersect two (y1, x1, y2, x2) rects, second corners exclusive.
+
+    Returns:
+        tuple: Intersection rect, or None if the rects don't overlap.
+
+    """
+    y1 = max(a[0], b[0])
+    x1 = max(a[1], b[1])
+    y2 = min(a[2], b[2])
+    x2 = min(a[3], b[3])
+    if y1 >= y2 or x1 >= x2:
+        return None
+    return (y1, x1, y2, x2)
+
+
+def merge_rects(rects):
+    """Merge overlapping or touching rects into their bounding rects.
+
+    Args:
+        rects (list): (y1, x1, y2, x2) rects, second corners exclusive.
+
+    Returns:
+        list: Non-overlapping rects sorted by position.
+
+    """
+    merged = []
+    for rect in rects:
+        rect = tuple(rect)
+        # keep absorbing rects until nothing touches the growing one
+        while True:
+            for i, other in enumerate(merged):
+                if (rect[0] <= other[2] and other[0] <= rect[2]
+                        and rect[1] <= other[3] and other[1] <= rect[3]):
+                    merged.pop(i)
+                    rect = (min(rect[0], other[0]), min(rect[1], other[1]),
+                            max(rect[2], other[2]), max(rect[3], other[3]))
+                    break
+            else:
+                break
+        merged.append(rect)
+    return sorted(merged)
+
+
+def _resize(buf, length):
+    """Resize a typed buffer, keeping its items. New items are zero.
+
+    Arrays from the array module are resized in place. NumPy arrays are
+    views of a larger store, which is only reallocated when it has to grow.
+    A reallocated store is given room to grow, and old views keep the old
+    store alive.
+
+    Returns:
+        Resized buffer, buf itself for the array module.
+
+    """
+    if np is None:
+        if length > len(buf):
+            buf.extend(array(buf.typecode, [0]) * (length - len(buf)))
+        else:
+            del buf[length:]
+        return buf
+    store = buf.base
+    if not (isinstance(store, np.ndarray) and store.ndim == 1
+            and store.dtype == buf.dtype
+            and store.ctypes.data == buf.ctypes.data):
+        store = buf  # owns its memory, or isn't a view made here
+    if length > store.size:
+        new = np.zeros(max(length, store.size * 3 // 2), dtype=buf.dtype)
+        new[:buf.size] = buf
+        store = new
+    return store[:length]
+
+
+def _copy(buf):
+    """Copy a typed buffer."""
+    if np is not None:
+        return buf.copy()
+    return array(buf.typecode, buf)
+
+
+class FrameBuffer:
+    """Frame Buffer.
+
+    Stores codepoint, foreground and background of every cell in parallel
+    typed arrays. Colors are stored as int SGR parameters.
+
+    """
+
+    def __init__(self, size=(0, 0), char=' ', fg='default', bg='default'):
+        """FrameBuffer __init__ method.
+
+        Args:
+            size (tuple, optional): (height, width) size. Defaults to (0, 0).
+            char (str, optional): Single char str to fill buffer with.
+                Defaults to ' '.
+            fg (str, optional): Foreground Color key or value.
+                Defaults to 'default'.
+            bg (str, optional): Background Color key or value.
+                Defaults to 'default'.
+
+        Raises:
+            TypeError: If size is not tuple.
+            ValueError: If size does not contain two (h, w) measures.
+            ValueError: If char is not exactly length 1.
+            ValueError: If fg or bg is not supported color key or value.
+
+        """
+        if not isinstance(size, tuple):
+            raise TypeError('size is not tuple')
+        if len(size) < 2:
+            raise ValueError('size: too few coordinates given')
+
+        self.size = (size[0], size[1])
+        length = size[0] * size[1]
+        self.chars = _alloc(_CHAR_TYPE, self.codepoint(char), length)
+        self.fgs = _alloc(_COLOR_TYPE, self.fgcode(fg), length)
+        self.bgs = _alloc(_COLOR_TYPE, self.bgcode(bg), length)
+
+    @staticmethod
+    def codepoint(char):
+        """Get the codepoint of a single char str.
+
+        Raises:
+            ValueError: If char is not exactly length 1.
+
+        """
+        if len(char) != 1:
+            raise ValueError('char is wrong length.')
+        return ord(char)
+
+    @staticmethod
+    def fgcode(fg):
+        """Get the int value of a Foreground Color key or value.
+
+        Raises:
+            ValueError: If fg is not supported color key or value.
+
+        """
+        try:
+            return FG_CODES[fg]
+        except KeyError:
+            raise ValueError("argument '{}' is not supported fg.".format(fg))
+
+    @staticmethod
+    def bgcode(bg):
+        """Get the int value of a Background Color key or value.
+
+        Raises:
+            ValueError: If bg is not supported color key or value.
+
+        """
+        try:
+            return BG_CODES[bg]
+        except KeyError:
+            raise ValueError("argument '{}' is not supported bg.".format(bg))
+
+    def index(self, y, x):
+        """Get flat index of a cell.
+
+        Args:
+            y (int): Row.
+            x (int): Column.
+
+        Returns:
+            int: Index into chars, fgs and bgs.
+
+        """
+        return y * self.size[1] + x
+
+    def inside(self, y, x):
+        """Check that a cell is inside the buffer.
+
+        Returns:
+            bool: True if (y, x) is a cell of the buffer.
+
+        """
+        return 0 <= y < self.size[0] and 0 <= x < self.size[1]
+
+    def get(self, y, x):
+        """Get a cell.
+
+        Args:
+            y (int): Row.
+            x (int): Column.
+
+        Returns:
+            tuple: (char, fg, bg) with colors as str values.
+
+        """
+        i = y * self.size[1] + x
+        return (chr(self.chars[i]), str(self.fgs[i]), str(self.bgs[i]))
+
+    def set(self, y, x, char=None, fg=None, bg=None):
+        """Configure a single cell. None leaves that part unchanged.
+
+        Args:
+            y (int): Row.
+            x (int): Column.
+            char (str, optional): Single char str. Defaults to None.
+            fg (str, optional): Foreground Color key or value.
+                Defaults to None.
+            bg (str, optional): Background Color key or value.
+                Defaults to None.
+
+        """
+        i = y * self.size[1] + x
+        if char is not None:
+            self.chars[i] = self.codepoint(char)
+        if fg is not None:
+            self.fgs[i] = self.fgcode(fg)
+        if bg is not None:
+            self.bgs[i] = self.bgcode(bg)
+
+    def segment(self, y, x):
+        """Get a cell as a Segment.
+
+        Args:
+            y (int): Row.
+            x (int): Column.
+
+        Returns:
+            Segment: New Segment with the contents of the cell.
+
+        """
+        char, fg, bg = self.get(y, x)
+        return Segment((y, x), char, fg=fg, bg=bg)
+
+    def write(self, y, x, text, fg=None, bg=None):
+        """Write a str along a row, clipped to the buffer.
+
+        Args:
+            y (int): Row.
+            x (int): Column of the first character, can be negative.
+            text (str): Characters to write, one per cell.
+            fg (str, optional): Foreground Color key or value. Defaults to
+                None, leaving it unchanged.
+            bg (str, optional): Background Color key or value. Defaults to
+                None, leaving it unchanged.
+
+        Returns:
+            int: Number of cells written.
+
+        """
+        h, w = self.size
+        if not 0 <= y < h or x >= w:
+            return 0
+        if x < 0:
+            text = text[-x:]
+            x = 0
+        text = text[:w - x]
+        n = len(text)
+        if n == 0:
+            return 0
+
+        i = y * w + x
+        self.chars[i:i + n] = _codepoints(text)
+        if fg is not None:
+            self.fgs[i:i + n] = _alloc(_COLOR_TYPE, self.fgcode(fg), n)
+        if bg is not None:
+            self.bgs[i:i + n] = _alloc(_COLOR_TYPE, self.bgcode(bg), n)
+        return n
+
+    def row(self, y, x1=0, x2=None):
+        """Get part of a row as lists.
+
+        Args:
+            y (int): Row.
+            x1 (int, optional): First column. Defaults to 0.
+            x2 (int, optional): Column after the last. Defaults to width.
+
+        Returns:
+            tuple: Lists of codepoints, fg values and bg values.
+
+        """
+        if x2 is None:
+            x2 = self.size[1]
+        i = y * self.size[1]
+        return (self.chars[i + x1:i + x2].tolist(),
+                self.fgs[i + x1:i + x2].tolist(),
+                self.bgs[i + x1:i + x2].tolist())
+
+    def fill(self, char=' ', fg='default', bg='default'):
+        """Set every cell to the same character and colors.
+
+        Args:
+            char (str, optional): Single char str. Defaults to ' '.
+            fg (str, optional): Foreground Color key or value.
+                Defaults to 'default'.
+            bg (str, optional): Background Color key or value.
+                Defaults to 'default'.
+
+        Returns:
+            FrameBuffer: self.
+
+        """
+        length = len(self.chars)
+        self.chars[:] = _alloc(_CHAR_TYPE, self.codepoint(char), length)
+        self.fgs[:] = _alloc(_COLOR_TYPE, self.fgcode(fg), length)
+        self.bgs[:] = _alloc(_COLOR_TYPE, self.bgcode(bg), length)
+        return self
+
+    def fill_rect(self, rect, char=' ', fg='default', bg='default'):
+        """Set every cell in a rect to the same character and colors.
+
+        The rect is clipped to the buffer. Whole rows are filled as one
+        slice, a single column as one strided slice.
+
+        Args:
+            rect (tuple): (y1, x1, y2, x2) area, second corner exclusive.
+            char (str, optional): Single char str, None leaves characters
+                unchanged. Defaults to ' '.
+            fg (str, optional): Foreground Color key or value, None leaves it
+                unchanged. Defaults to 'default'.
+            bg (str, optional): Background Color key or value, None leaves it
+                unchanged. Defaults to 'default'.
+
+        Returns:
+            FrameBuffer: self.
+
+        """
+        parts = []
+        if char is not None:
+            parts.append((self.chars, self.codepoint(char), _CHAR_TYPE))
+        if fg is not None:
+            parts.append((self.fgs, self.fgcode(fg), _COLOR_TYPE))
+        if bg is not None:
+            parts.append((self.bgs, self.bgcode(bg), _COLOR_TYPE))
+
+        area = intersect(rect, (0, 0) + self.size)
+        if area is None or not parts:
+            return self
+        y1, x1, y2, x2 = area
+        h, w = self.size
+        n = x2 - x1
+
+        for buf, value, typecode in parts:
+            if np is not None:
+                buf.reshape(h, w)[y1:y2, x1:x2] = value
+            elif n == 1:
+                i = y1 * w + x1
+                buf[i:(y2 - 1) * w + x1 + 1:w] = _alloc(
+                    typecode, value, y2 - y1)
+            elif n == w:
+                buf[y1 * w:y2 * w] = _alloc(typecode, value, (y2 - y1) * w)
+            else:
+                fill = _alloc(typecode, value, n)
+                for y in range(y1, y2):
+                    i = y * w + x1
+                    buf[i:i + n] = fill
+        return self
+
+    def transparent(self):
+        """Make a mask of the cells an overlay shows what's below through.
+
+        Returns:
+            bytearray: 1 for every whitespace cell, 0 for others, indexed
+                like the buffer. A bool array when NumPy is installed.
+
+        """
+        if np is not None:
+            return np.isin(self.chars, _SPACES)
+        spaces = _SPACE_SET
+        return bytearray(c in spaces for c in self.chars)
+
+    def copy_span(self, src, si, di, n, mask=None):
+        """Copy a run of cells from another buffer.
+
+        Args:
+            src (FrameBuffer): Buffer to copy from.
+            si (int): Index of first cell in src.
+            di (int): Index of first cell in self.
+            n (int): Number of cells.
+            mask (bytearray, optional): Transparency mask of src, from
+                transparent(). Masked cells only copy their bg.
+                Defaults to None.
+
+        """
+        self.bgs[di:di + n] = src.bgs[si:si + n]
+        if mask is None:
+            self.chars[di:di + n] = src.chars[si:si + n]
+            self.fgs[di:di + n] = src.fgs[si:si + n]
+        elif np is not None:
+            keep = ~mask[si:si + n]
+            self.chars[di:di + n][keep] = src.chars[si:si + n][keep]
+            self.fgs[di:di + n][keep] = src.fgs[si:si + n][keep]
+        else:
+            # copy runs of opaque cells
+            start = si
+            end = si + n
+            while start < end:
+                start = mask.find(0, start, end)
+                if start < 0:
+                    break
+                stop = mask.find(1, start, end)
+                if stop < 0:
+                    stop = end
+                d = di + start - si
+                self.chars[d:d + stop - start] = src.chars[start:stop]
+                self.fgs[d:d + stop - start] = src.fgs[start:stop]
+                start = stop
+
+    def blit(self, src, pos=(0, 0), clip=None, mask=None):
+        """Copy another buffer onto this one.
+
+        The copy is clipped to this buffer, so src may lie partly or fully
+        outside it.
+
+        Args:
+            src (FrameBuffer): Buffer to copy from.
+            pos (tuple, optional): (y, x) position of src in this buffer,
+                can be negative. Defaults to (0, 0).
+            clip (tuple, optional): (y1, x1, y2, x2) area of this buffer to
+                copy to, second corner exclusive. Defaults to all of it.
+            mask (bytearray, optional): Transparency mask of src, from
+                transparent(). Masked cells only copy their bg.
+                Defaults to None.
+
+        Returns:
+            FrameBuffer: self.
+
+        """
+        y0, x0 = pos
+        sh, sw = src.size
+        area = intersect((y0, x0, y0 + sh, x0 + sw), (0, 0) + self.size)
+        if area is not None and clip is not None:
+            area = intersect(area, clip)
+        if area is None:
+            return self
+
+        y1, x1, y2, x2 = area
+        w = self.size[1]
+
+        if np is not None:
+            h = self.size[0]
+            dst = (slice(y1, y2), slice(x1, x2))
+            part = (slice(y1 - y0, y2 - y0), slice(x1 - x0, x2 - x0))
+            self.bgs.reshape(h, w)[dst] = src.bgs.reshape(sh, sw)[part]
+            if mask is None:
+                self.chars.reshape(h, w)[dst] = src.chars.reshape(sh, sw)[part]
+                self.fgs.reshape(h, w)[dst] = src.fgs.reshape(sh, sw)[part]
+            else:
+                keep = ~mask.reshape(sh, sw)[part]
+                chars = self.chars.reshape(h, w)[dst]
+                chars[keep] = src.chars.reshape(sh, sw)[part][keep]
+                fgs = self.fgs.reshape(h, w)[dst]
+                fgs[keep] = src.fgs.reshape(sh, sw)[part][keep]
+            return self
+
+        n = x2 - x1
+        for y in range(y1, y2):
+            self.copy_span(src, (y - y0) * sw + x1 - x0, y * w + x1, n, mask)
+        return self
+
+    def copy(self):
+        """Copy the buffer.
+
+        Returns:
+            FrameBuffer: New buffer with the same size and contents.
+
+        """
+        new = FrameBuffer.__new__(FrameBuffer)
+        new.size = self.size
+        new.chars = _copy(self.chars)
+        new.fgs = _copy(self.fgs)
+        new.bgs = _copy(self.bgs)
+        return new
+
+    def to_string(self, color=True):
+        """Get the buffer as text.
+
+        Args:
+            color (bool, optional): Include color escapes, set when fg or bg
+                change and reset at the end of each row. Defaults to True.
+
+        Returns:
+            str: Rows separated by newlines.
+
+        """
+        h, w = self.size
+        chars = self.chars.tolist()
+        fgs = self.fgs.tolist()
+        bgs = self.bgs.tolist()
+        rows = []
+        for y in range(h):
+            i = y * w
+            if not color:
+                rows.append(''.join(map(chr, chars[i:i + w])))
+                continue
+            row = []
+            last = None
+            for c, f, b in zip(chars[i:i + w], fgs[i:i + w], bgs[i:i + w]):
+                if (f, b) != last:
+                    row.append(SGR[f, b])
+                    last = (f, b)
+                row.append(chr(c))
+            if row:
+                row.append(RESET)
+            rows.append(''.join(row))
+        return '\n'.join(rows)
+
+    def resize(self, size, char=' ', fg='default', bg='default'):
+        """Resize the buffer.
+
+        Cells that exist in both sizes are kept, new cells are filled. Rows
+        are moved within the existing arrays, which are only reallocated
+        when they grow past their capacity, so a stream of resizes doesn't
+        allocate a buffer each time. Views of the arrays stay valid, but
+        may see the moved cells.
+
+        Args:
+            size (tuple): (height, width) size.
+            char (str, optional): Single char str for new cells.
+                Defaults to ' '.
+            fg (str, optional): Foreground Color for new cells.
+                Defaults to 'default'.
+            bg (str, optional): Background Color for new cells.
+                Defaults to 'default'.
+
+        Returns:
+            FrameBuffer: self.
+
+        Raises:
+            TypeError: If size is not tuple.
+            ValueError: If size does not contain two (h, w) measures.
+
+        """
+        if not isinstance(size, tuple):
+            raise TypeError('size is not tuple')
+        if len(size) < 2:
+            raise ValueError('size: too few coordinates given')
+
+        h0, w0 = self.size
+        h, w = size[0], size[1]
+        if (h, w) == (h0, w0):
+            return self
+        keep = min(h0, h)  # rows in both sizes
+        values = (self.codepoint(char), self.fgcode(fg), self.bgcode(bg))
+        types = (_CHAR_TYPE, _COLOR_TYPE, _COLOR_TYPE)
+
+        bufs = []
+        for buf, value, typecode in zip(
+                (self.chars, self.fgs, self.bgs), values, types):
+            if w <= w0:
+                # narrower rows move towards the start, first row first
+                for y in range(1, keep):
+                    buf[y * w:y * w + w] = buf[y * w0:y * w0 + w]
+                buf = _resize(buf, h * w)
+            else:
+                # wider rows move towards the end, last row first
+                buf = _resize(buf, max(h0 * w0, h * w))
+                fill = _alloc(typecode, value, w - w0)
+                for y in range(keep - 1, -1, -1):
+                    buf[y * w:y * w + w0] = buf[y * w0:y * w0 + w0]
+                    buf[y * w + w0:y * w + w] = fill
+                buf = _resize(buf, h * w)
+            if h > keep:
+                buf[keep * w:] = _alloc(typecode, value, (h - keep) * w)
+            bufs.append(buf)
+        self.chars, self.fgs, self.bgs = bufs
+
+        self.size = (h, w)
+        return self
+
+    def diff(self, other, rects=None):
+        """Find cells that differ from another buffer of the same size.
+
+        Args:
+            other (FrameBuffer): Buffer to compare against.
+            rects (list, optional): Non-overlapping (y1, x1, y2, x2) rects to
+                limit the comparison to. Defaults to the whole buffer.
+
+        Returns:
+            list: (y, x1, x2) spans of changed cells sorted by position, x2
+                exclusive.
+
+        """
+        w = self.size[1]
+        if rects is None:
+            rects = [(0, 0, self.size[0], w)]
+        ranges = sorted((y, r[1], r[3]) for r in rects
+                        for y in range(r[0], r[2]))
+
+        spans = []
+        for y, x1, x2 in ranges:
+            i = y * w + x1
+            j = y * w + x2
+            if (_same(self.chars[i:j], other.chars[i:j])
+                    and _same(self.fgs[i:j], other.fgs[i:j])
+                    and _same(self.bgs[i:j], other.bgs[i:j])):
+                continue
+
+            start = None
+            cells = zip(self.chars[i:j].tolist(), self.fgs[i:j].tolist(),
+                        self.bgs[i:j].tolist())
+            old = zip(other.chars[i:j].tolist(), other.fgs[i:j].tolist(),
+                      other.bgs[i:j].tolist())
+            for x, (a, b) in enumerate(zip(cells, old), x1):
+                if a != b:
+                    if start is None:
+                        start = x
+                elif start is not None:
+                    spans.append((y, start, x))
+                    start = None
+            if start is not None:
+                spans.append((y, start, x2))
+
+        return spans
@@ -0,0 +1,319 @@
+"""Key Reader.
+
+Reads keystrokes from the terminal without blocking the event loop, so input
+and frames from a Scheduler interleave. Keys are decoded into names and
+dispatched through a table of bindings.
+"""
+
+import asyncio
+import codecs
+import os
+import sys
+
+try:
+    import termios
+except ImportError:  # windows
+    termios = None
+    import msvcrt
+
+# escape sequences sent by common terminals
+SEQUENCES = {
+    '\033[A': 'up',
+    '\033[B': 'down',
+    '\033[C': 'right',
+    '\033[D': 'left',
+    '\033[H': 'home',
+    '\033[F': 'end',
+    '\033OA': 'up',
+    '\033OB': 'down',
+    '\033OC': 'right',
+    '\033OD': 'left',
+    '\033OH': 'home',
+    '\033OF': 'end',
+    '\033[1~': 'home',
+    '\033[2~': 'insert',
+    '\033[3~': 'delete',
+    '\033[4~': 'end',
+    '\033[5~': 'pageup',
+    '\033[6~': 'pagedown',
+    '\033OP': 'f1',
+    '\033OQ': 'f2',
+    '\033OR': 'f3',
+    '\033OS': 'f4',
+    '\033[15~': 'f5',
+    '\033[17~': 'f6',
+    '\033[18~': 'f7',
+    '\033[19~': 'f8',
+    '\033[20~': 'f9',
+    '\033[21~': 'f10',
+    '\033[23~': 'f11',
+    '\033[24~': 'f12',
+    '\033[Z': 'shift+tab',
+}
+
+# single control characters
+CONTROLS = {
+    '\r': 'enter',
+    '\n': 'enter',
+    '\t': 'tab',
+    '\x7f': 'backspace',
+    '\b': 'backspace',
+    '\033': 'escape',
+}
+CONTROLS.update({chr(i): 'ctrl+' + chr(i + 96)
+                 for i in range(1, 27) if chr(i) not in CONTROLS})
+
+# windows consoles prefix special keys with one of these
+_WIN_PREFIX = ('\x00', '\xe0')
+_WIN_KEYS = {
+    'H': 'up', 'P': 'down', 'M': 'right', 'K': 'left', 'G': 'home',
+    'O': 'end', 'R': 'insert', 'S': 'delete', 'I': 'pageup', 'Q': 'pagedown',
+    ';': 'f1', '<': 'f2', '=': 'f3', '>': 'f4', '?': 'f5', '@': 'f6',
+    'A': 'f7', 'B': 'f8', 'C': 'f9', 'D': 'f10',
+}
+
+
+def decode(data, final=False):
+    """Split decoded terminal input into key names.
+
+    Printable characters are their own name, known escape sequences and
+    control characters get names like 'up' or 'ctrl+a'.
+
+    An escape at the end of data may be the start of a sequence split across
+    reads, so it is held back as rest unless final is set. Then a lone escape
+    is the escape key, and an incomplete sequence is alt with its second
+    character followed by the characters after it.
+
+    Args:
+        data (str): Input read from the terminal.
+        final (bool, optional): No more input is coming for now.
+            Defaults to False.
+
+    Returns:
+        tuple: (keys, rest), list of key names and an incomplete escape
+            sequence at the end of data to prepend to the next read.
+
+    """
+    keys = []
+    i = 0
+    n = len(data)
+    while i < n:
+        c = data[i]
+        if c == '\033' and i + 1 == n:
+            if not final:
+                return keys, data[i:]
+            keys.append('escape')
+            i += 1
+        elif c == '\033' and data[i + 1] in '[O':
+            # CSI and SS3 sequences end with a byte in @..~
+            if data[i + 1] == 'O':
+                j = i + 3
+            else:
+                j = i + 2
+                while j < n and not '@' <= data[j] <= '~':
+                    j += 1
+                j += 1
+            if j > n:
+                if not final:
+                    return keys, data[i:]
+                keys.append('alt+' + data[i + 1])
+                i += 2
+                continue
+            seq = data[i:j]
+            keys.append(SEQUENCES.get(seq, seq))
+            i = j
+        elif c == '\033':
+            # escape followed by a key is how terminals send alt+key
+            j = i + 2
+            if data[i + 1] == '\033':
+                j = i + 1
+                keys.append('escape')
+            else:
+                key = data[i + 1]
+                keys.append('alt+' + CONTROLS.get(key, key))
+            i = j
+        else:
+            keys.append(CONTROLS.get(c, c))
+            i += 1
+    return keys, ''
+
+
+class KeyReader:
+    """Key Reader.
+
+    Puts the terminal in raw mode while active and reads stdin from the event
+    loop. Each key is looked up in bindings and passed to the handler found,
+    handlers may be plain functions or coroutines. Use it as a context manager
+    to restore the terminal when done.
+
+    """
+
+    def __init__(self, fd=None, loop=None, **kwargs):
+        """KeyReader __init__ method.
+
+        Args:
+            fd (int, optional): File descriptor to read. Defaults to stdin.
+            loop (asyncio.AbstractEventLoop, optional): Event loop to read
+                on. Defaults to the loop running when start() is called.
+            **bindings (dict): key name to handler mapping.
+            **fallback (callable): Handler for keys without a binding, called
+                with the key name. Defaults to None, ignoring them.
+            **poll (float): Seconds between polls where the loop can't watch
+                the terminal (windows). Defaults to 0.01.
+            **timeout (float): Seconds to wait for the rest of an escape
+                sequence before taking what came as keys. Defaults to 0.05.
+
+        """
+        self.fd = sys.stdin.fileno() if fd is None else fd
+        self.loop = loop
+        self.bindings = dict(kwargs.get('bindings', {}))
+        self.fallback = kwargs.get('fallback', None)
+        self.poll = kwargs.get('poll', 0.01)
+        self.timeout = kwargs.get('timeout', 0.05)
+        self.active = False
+        self._attrs = None  # terminal attributes to restore
+        self._decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        self._pending = ''  # incomplete escape sequence
+        self._handle = None  # polling timer on windows
+        self._flush_handle = None  # timer for a pending escape sequence
+
+    def bind(self, key, handler):
+        """Bind a handler to a key.
+
+        Args:
+            key (str): Key name, like 'a', 'enter' or 'ctrl+c'.
+            handler (callable): Called with the key name.
+
+        """
+        self.bindings[key] = handler
+
+    def unbind(self, key):
+        """Remove the handler bound to a key.
+
+        Args:
+            key (str): Key name.
+
+        Returns:
+            bool: False if nothing was bound, or True if something was.
+
+        """
+        return self.bindings.pop(key, None) is not None
+
+    def dispatch(self, key):
+        """Call the handler bound to a key.
+
+        Args:
+            key (str): Key name.
+
+        Returns:
+            Whatever the handler returns, coroutines are scheduled as tasks.
+
+        """
+        handler = self.bindings.get(key, self.fallback)
+        if handler is None:
+            return None
+        result = handler(key)
+        if asyncio.iscoroutine(result):
+            return asyncio.ensure_future(result, loop=self.loop)
+        return result
+
+    def feed(self, data):
+        """Decode raw input and dispatch every complete key in it.
+
+        An incomplete escape sequence at the end waits for the next read,
+        and is flushed as keys if none comes within timeout.
+
+        Args:
+            data (bytes): Bytes read from the terminal.
+
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        keys, self._pending = decode(
+            self._pending + self._decoder.decode(data))
+        if self._pending and self.loop is not None:
+            self._flush_handle = self.loop.call_later(
+                self.timeout, self.flush)
+        for key in keys:
+            self.dispatch(key)
+
+    def flush(self):
+        """Dispatch a pending incomplete escape sequence as keys."""
+        self._flush_handle = None
+        keys, self._pending = decode(self._pending, final=True)
+        for key in keys:
+            self.dispatch(key)
+
+    def start(self):
+        """Enter raw mode and start reading keys.
+
+        Raises:
+            RuntimeError: If no loop was given and none is running.
+
+        """
+        if self.active:
+            return
+        if self.loop is None:
+            # raises outside a running loop, keys would never be read
+            self.loop = asyncio.get_running_loop()
+        if termios is not None:
+            self._attrs = termios.tcgetattr(self.fd)
+            attrs = termios.tcgetattr(self.fd)
+            # no line buffering, echo or flow control; keep ctrl+c and
+            # output processing so print still works
+            attrs[0] &= ~(termios.ICRNL | termios.IXON | termios.ISTRIP)
+            attrs[3] &= ~(termios.ICANON | termios.ECHO | termios.IEXTEN)
+            attrs[6][termios.VMIN] = 1
+            attrs[6][termios.VTIME] = 0
+            termios.tcsetattr(self.fd, termios.TCSANOW, attrs)
+            self.loop.add_reader(self.fd, self._read)
+        else:
+            self._handle = self.loop.call_soon(self._poll)
+        self.active = True
+
+    def stop(self):
+        """Stop reading keys and restore the terminal."""
+        if not self.active:
+            return
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if termios is not None:
+            self.loop.remove_reader(self.fd)
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, self._attrs)
+            self._attrs = None
+        elif self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self.active = False
+
+    def _read(self):
+        """Read what is available on the terminal."""
+        try:
+            data = os.read(self.fd, 1024)
+        except (BlockingIOError, InterruptedError):
+            return
+        self.feed(data)
+
+    def _poll(self):
+        """Read waiting keys from a windows console."""
+        keys = []
+        while msvcrt.kbhit():
+            c = msvcrt.getwch()
+            if c in _WIN_PREFIX:
+                c = msvcrt.getwch()
+                keys.append(_WIN_KEYS.get(c, c))
+            else:
+                keys.append(CONTROLS.get(c, c))
+        for key in keys:
+            self.dispatch(key)
+        self._handle = self.loop.call_later(self.poll, self._poll)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
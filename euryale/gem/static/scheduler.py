@@ -0,0 +1,133 @@
+"""Frame Scheduler.
+
+Renders a compositor from an asyncio event loop. Mutations request a frame
+instead of compositing right away, and every request made before the next
+tick is served by the same frame.
+"""
+
+import asyncio
+
+
+class Scheduler:
+    """Frame Scheduler.
+
+    Composites at most once per tick, capped at a maximum frame rate. Attach
+    it to a compositor and boxes request frames on their own when they change.
+
+    Frames are scheduled on the running loop. Requests made while no loop
+    runs, like building boxes before asyncio.run(), are dropped. Whatever
+    they changed stays damaged and is drawn by the first frame on the loop.
+
+    """
+
+    def __init__(self, compositor, fps=60, loop=None):
+        """Scheduler __init__ method.
+
+        Args:
+            compositor (Compositor): Compositor to render.
+            fps (int, optional): Maximum frames per second. None disables the
+                cap. Defaults to 60.
+            loop (asyncio.AbstractEventLoop, optional): Event loop to render
+                on. Defaults to the running loop at the time of each request.
+
+        """
+        self.compositor = compositor
+        self.fps = fps
+        self.loop = loop
+        self.frames = 0  # frames presented
+        self.requests = 0  # requests made, including coalesced ones
+        self._last = None  # loop time of the last frame
+        self._future = None  # future of the pending frame
+        self._handle = None  # timer of the pending frame
+        self._loop = None  # loop of the pending or last frame
+
+        compositor.scheduler = self
+
+    @property
+    def interval(self):
+        """Get the shortest time between two frames.
+
+        Returns:
+            float: Seconds.
+
+        """
+        return 1 / self.fps if self.fps else 0
+
+    @property
+    def pending(self):
+        """Check if a frame is waiting to be rendered.
+
+        Returns:
+            bool: True if a frame has been requested but not presented.
+
+        """
+        return self._future is not None
+
+    def request(self):
+        """Request a frame.
+
+        Returns:
+            asyncio.Future: Resolves with the frame count once the frame is
+                presented. Requests before the next tick share it. None if
+                no loop is running.
+
+        """
+        self.requests += 1
+        if self._future is not None and self._loop.is_closed():
+            # left pending by a loop that has finished
+            self._future = None
+            self._handle = None
+        if self._future is None:
+            loop = self.loop
+            if loop is None:
+                try:
+                    loop = asyncio.get_running_loop()
+                except RuntimeError:
+                    return None
+            if loop is not self._loop:
+                self._loop = loop
+                self._last = None  # frame times of another loop
+            self._future = loop.create_future()
+            now = loop.time()
+            when = now if self._last is None else max(
+                now, self._last + self.interval)
+            self._handle = loop.call_at(when, self._tick)
+        return self._future
+
+    async def frame(self):
+        """Request a frame and wait for it to be presented.
+
+        Returns:
+            int: Frame count.
+
+        """
+        return await self.request()
+
+    def _tick(self):
+        """Render the pending frame."""
+        future = self._future
+        self._future = None
+        self._handle = None
+        self._last = self._loop.time()
+
+        try:
+            self.compositor.composite()
+        except Exception as e:
+            if not future.cancelled():
+                future.set_exception(e)
+            return
+
+        self.frames += 1
+        if not future.cancelled():
+            future.set_result(self.frames)
+
+    def close(self):
+        """Cancel the pending frame and detach from the compositor."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+        if self.compositor.scheduler is self:
+            self.compositor.scheduler = None
@@ -3,6 +3,46 @@
 Handles storage and rendering of ANSI-decorated single characters.
 """
 
+import sys
+
+# control character libraries, shared by all segments
+FGS = {
+    'black': "30",
+    'red': "31",
+    'green': "32",
+    'yellow': "33",
+    'blue': "34",
+    'magenta': "35",
+    'cyan': "36",
+    'white': "37",
+
+    'reset': "39",
+    'default': "37"
+}
+BGS = {
+    'black': "40",
+    'red': "41",
+    'green': "42",
+    'yellow': "43",
+    'blue': "44",
+    'magenta': "45",
+    'cyan': "46",
+    'white': "47",
+
+    'reset': "49",
+    'default': "40"
+}
+
+RESET = "\033[0m"
+
+# escape prefix for every fg/bg pair, keyed by both str and int values so
+# segments and frame buffers can share it
+SGR = {}
+for _fg in set(FGS.values()):
+    for _bg in set(BGS.values()):
+        SGR[(_fg, _bg)] = SGR[(int(_fg), int(_bg))] = sys.intern(
+            "\033[{};{}m".format(_fg, _bg))
+
 
 class Segment:
     """Segment.
@@ -10,6 +50,11 @@ class Segment:
     Handles storage and rendering of ANSI-decorated single characters.
     """
 
+    __slots__ = ('pos', 'char', 'fg', 'bg')
+
+    fgs = FGS
+    bgs = BGS
+
     def __init__(self, pos=(0, 0), char=' ', **kwargs):
         """Segment __init__ method.
 
@@ -40,35 +85,6 @@ class Segment:
 
         self.pos = pos
         self.char = char
-        # control character libraries
-        self.fgs = {
-            'black': "30",
-            'red': "31",
-            'green': "32",
-            'yellow': "33",
-            'blue': "34",
-            'magenta': "35",
-            'cyan': "36",
-            'white': "37",
-
-            'reset': "39",
-            'default': "37"
-        }
-        self.bgs = {
-            'black': "40",
-            'red': "41",
-            'green': "42",
-            'yellow': "43",
-            'blue': "44",
-            'magenta': "45",
-            'cyan': "46",
-            'white': "47",
-
-            'reset': "49",
-            'default': "40"
-        }
-        self.fg = self.fgs['default']
-        self.bg = self.bgs['default']
         self.setfg(fg)
         self.setbg(bg)
 
@@ -79,10 +95,7 @@ class Segment:
             str: Formatted str.
 
         """
-        ret = "{}{};{}m{}{}".format(
-            "\033[", self.fg, self.bg, self.char, "\033[0m")
-
-        return ret
+        return SGR[self.fg, self.bg] + self.char + RESET
 
     def setcharacter(self, char=' '):
         """Set new character.
@@ -117,9 +130,9 @@ class Segment:
 
         """
         try:
-            self.fg = self.fgs[fg]
+            self.fg = FGS[fg]
         except KeyError:
-            if fg in self.fgs.values():
+            if fg in FGS.values():
                 self.fg = fg
             else:
                 raise ValueError('argument is not supported fg.')
@@ -140,9 +153,9 @@ class Segment:
 
         """
         try:
-            self.bg = self.bgs[bg]
+            self.bg = BGS[bg]
         except KeyError:
-            if bg in self.bgs.values():
+            if bg in BGS.values():
                 self.bg = bg
             else:
                 raise ValueError('argument is not supported bg.')
@@ -0,0 +1,128 @@
+"""Output Sinks.
+
+Where a compositor writes its encoded frames. Anything with a write(data)
+method taking bytes works, these cover the terminal, files and memory.
+"""
+
+import os
+import sys
+
+
+class StdoutSink:
+    """Stdout Sink.
+
+    Writes each frame to stdout in a single call, the default sink.
+
+    """
+
+    def __init__(self, encoding='utf-8'):
+        """StdoutSink __init__ method.
+
+        Args:
+            encoding (str, optional): Encoding of the frames, used where they
+                have to go through sys.stdout as str. Defaults to 'utf-8'.
+
+        """
+        self.encoding = encoding
+
+    def write(self, data):
+        """Write encoded output to stdout.
+
+        Args:
+            data (bytes): Encoded output.
+
+        """
+        if not data:
+            return
+        # colorama wraps stdout to translate escapes on windows, so only go
+        # around it elsewhere
+        if os.name != 'nt':
+            try:
+                fd = sys.stdout.fileno()
+            except (AttributeError, OSError, ValueError):
+                fd = None
+            if fd is not None:
+                sys.stdout.flush()
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+                return
+
+        sys.stdout.write(data.decode(self.encoding))
+        sys.stdout.flush()
+
+
+class FileSink:
+    """File Sink.
+
+    Appends frames to a file, for recording a session to replay with cat.
+
+    """
+
+    def __init__(self, file):
+        """FileSink __init__ method.
+
+        Args:
+            file (str, file): Path to open, or a file opened in binary mode.
+
+        """
+        if isinstance(file, str):
+            self.file = open(file, 'wb')
+            self.owned = True  # opened here, so closed here too
+        else:
+            self.file = file
+            self.owned = False
+
+    def write(self, data):
+        """Write encoded output to the file.
+
+        Args:
+            data (bytes): Encoded output.
+
+        """
+        if data:
+            self.file.write(data)
+            self.file.flush()
+
+    def close(self):
+        """Close the file if the sink opened it."""
+        if self.owned:
+            self.file.close()
+
+
+class BytesSink:
+    """Bytes Sink.
+
+    Keeps frames in memory, for tests, benchmarks and running without a
+    terminal.
+
+    """
+
+    def __init__(self):
+        """BytesSink __init__ method."""
+        self.buffer = bytearray()
+        self.writes = 0  # number of non-empty writes
+
+    def write(self, data):
+        """Append encoded output to the buffer.
+
+        Args:
+            data (bytes): Encoded output.
+
+        """
+        if data:
+            self.buffer += data
+            self.writes += 1
+
+    def getvalue(self):
+        """Get everything written since the last clear().
+
+        Returns:
+            bytes: Encoded output.
+
+        """
+        return bytes(self.buffer)
+
+    def clear(self):
+        """Empty the buffer."""
+        del self.buffer[:]
@@ -0,0 +1,76 @@
+"""Frame Stats.
+
+Timings and counters of a single frame, recorded by a compositor while it
+has observers.
+"""
+
+import time
+
+# phases of a frame, in order
+PHASES = ('update', 'layout', 'damage', 'clear', 'blit', 'encode', 'write')
+
+
+class FrameStats:
+    """Frame Stats.
+
+    Phase times are in seconds. Cells counts every cell cleared or painted,
+    so cells painted by overlapping overlay boxes count once per box.
+
+    """
+
+    __slots__ = ('frame', 'times', 'cells', 'boxes', 'skipped', 'bytes',
+                 '_last')
+
+    def __init__(self, frame=0):
+        """FrameStats __init__ method.
+
+        Args:
+            frame (int, optional): Frame number. Defaults to 0.
+
+        """
+        self.frame = frame
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.cells = 0  # cells cleared or painted
+        self.boxes = 0  # boxes painted
+        self.skipped = 0  # boxes left alone, unchanged or hidden
+        self.bytes = 0  # bytes written
+        self._last = time.perf_counter()
+
+    @property
+    def total(self):
+        """Get the time spent on the frame.
+
+        Returns:
+            float: Seconds.
+
+        """
+        return sum(self.times.values())
+
+    def start(self):
+        """Start timing from now, time before isn't counted."""
+        self._last = time.perf_counter()
+
+    def lap(self, phase):
+        """Add the time since the last lap or start to a phase.
+
+        Args:
+            phase (str): Phase name from PHASES.
+
+        """
+        now = time.perf_counter()
+        self.times[phase] += now - self._last
+        self._last = now
+
+    def __str__(self):
+        """Summarize the frame in a few short lines."""
+        ms = {k: v * 1000 for k, v in self.times.items()}
+        return (
+            "frame {} {:.2f}ms\n"
+            "cells {} bytes {}\n"
+            "boxes {} skipped {}\n"
+            "upd {update:.2f} lay {layout:.2f}\n"
+            "dmg {damage:.2f} clr {clear:.2f}\n"
+            "blt {blit:.2f} enc {encode:.2f}\n"
+            "wri {write:.2f}").format(
+                self.frame, self.total * 1000, self.cells, self.bytes,
+                self.boxes, self.skipped, **ms)
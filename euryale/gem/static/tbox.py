@@ -5,8 +5,8 @@ outline.
 
 """
 
-import textwrap
 from .dbox import DBox
+from .wrapcache import WrapCache
 
 
 class TBox(DBox):
@@ -15,8 +15,14 @@ class TBox(DBox):
     Options for stripping newlines from input, as well as wrapping and box
     outline.
 
+    Text is laid out through a WrapCache shared by every text box, so
+    updates that don't change the text, its width or the layout options
+    don't wrap it again.
+
     """
 
+    cache = WrapCache()
+
     def __init__(self, parent, name=None, pos=(0, 0), size=(0, 0), **kwargs):
         """Text Box __init__ method.
 
@@ -87,12 +93,14 @@ class TBox(DBox):
         )
 
         self._text = text
-        self.wrap = wrap
-        self.justify = justify
-        self.strip_newlines = strip_newlines
+        self._rendered = None  # str of text at last update
+        self._wrap = wrap
+        self._justify = justify
+        self._strip_newlines = strip_newlines
+        self.border = False
 
         self.setborder(border)
-        self.update()
+        self.request_update()
 
     @property
     def text(self):
@@ -112,7 +120,73 @@ class TBox(DBox):
     @text.setter
     def text(self, text):
         self._text = text
-        self.update()
+        if callable(text) or str(text) != self._rendered:
+            self.mark_dirty()
+        if self.dirty:
+            self.request_update()
+
+    @property
+    def wrap(self):
+        """Get the wrap option. Set the wrap option without updating.
+
+        Returns:
+            bool: Wrap text in box.
+
+        """
+        return self._wrap
+
+    @wrap.setter
+    def wrap(self, wrap):
+        if wrap != self._wrap:
+            self._wrap = wrap
+            self.mark_dirty()
+
+    @property
+    def justify(self):
+        """Get the text justification. Set it without updating.
+
+        Returns:
+            str: 'left', 'right', 'center' or None.
+
+        """
+        return self._justify
+
+    @justify.setter
+    def justify(self, justify):
+        if justify != self._justify:
+            self._justify = justify
+            self.mark_dirty()
+
+    @property
+    def strip_newlines(self):
+        """Get the strip newlines option. Set it without updating.
+
+        Returns:
+            bool: Strip newlines from text.
+
+        """
+        return self._strip_newlines
+
+    @strip_newlines.setter
+    def strip_newlines(self, strip_newlines):
+        if strip_newlines != self._strip_newlines:
+            self._strip_newlines = strip_newlines
+            self.mark_dirty()
+
+    @property
+    def dirty(self):
+        """Check if anything the text box depends on changed since update().
+
+        Callable text is called, but only counts as a change when it returns
+        a different str.
+
+        Returns:
+            bool: True if the grid is out of date.
+
+        """
+        if not self._dirty and callable(self._text):
+            self._dirty = str(self._text()) != self._rendered
+        return self._dirty
 
     def resize(self, newsize):
         """Resize the box.
@@ -120,11 +194,8 @@ class TBox(DBox):
         Args:
             newsize (tuple): (height, width) size.
         """
-        self.grid = []
-        self.segments = []
-        self.size = newsize
-        self.populate()
-        self.update()
+        # update() sets the border points again
+        super().resize(newsize, rm_oldpoints=True)
 
     def setwrap(self, wrap=False):
         """Set wrap option.
@@ -142,7 +213,7 @@ class TBox(DBox):
         if not isinstance(wrap, bool):
             raise TypeError('argument is not bool')
         self.wrap = wrap
-        self.update()
+        self.request_update()
         return self.wrap
 
     def toggle_wrap(self):
@@ -153,7 +224,7 @@ class TBox(DBox):
 
         """
         self.wrap = not self.wrap
-        self.update()
+        self.request_update()
         return self.wrap
 
     def setborder(self, border=False):
@@ -175,7 +246,9 @@ class TBox(DBox):
                 and border not in self.styles.values()):
             raise ValueError('argument is not valid border style')
 
-        self.border = border
+        if border != self.border:
+            self.border = border
+            self.mark_dirty()
 
         if self.border is not False:
 
@@ -190,49 +263,23 @@ class TBox(DBox):
         self.setborder(self.border)
         super().update()
         text = str(self.text)
-        if self.strip_newlines:
-            text = text.replace('\n', '')
-
-        if self.wrap:
-            if self.border is not False:
-                wrapper = textwrap.TextWrapper(width=self.size[1] - 2)
-                wrapped = wrapper.wrap(text)
-            else:
-                # changed this from -2 because it didn't seem necessary
-                # justify below also follows changed state
-                wrapper = textwrap.TextWrapper(width=self.size[1])
-                wrapped = wrapper.wrap(text)
+        self._rendered = text
+        width = self.size[1] - 2 if self.border is not False else self.size[1]
+        wrapped = self.cache.layout(text, width, self.wrap, self.justify,
+                                    self.strip_newlines)
 
+        # text goes inside the border, which long lines still write over
+        # on the right
+        if self.border is not False:
+            rows = range(1, self.size[0] - 1)
+            x = 1
         else:
-            wrapped = text.split("\n")
-
-        # new, justify text
-        if self.justify is not None:
-            delta = 2 if self.border is not False else 0
-            if self.justify == "left":
-                wrapped = map(lambda s: s.ljust(self.size[1] - delta), wrapped)
-            elif self.justify == "right":
-                wrapped = map(lambda s: s.rjust(self.size[1] - delta), wrapped)
-            elif self.justify == "center":
-                wrapped = map(lambda s: s.center(
-                    self.size[1] - delta), wrapped)
-
-        for y, line in enumerate(wrapped):
-            for x, c in enumerate(line):
-                if c == "\n":
-                    continue
-                if all([y <= self.size[0] - 1, x <= self.size[1] - 1]):
-                    if self.border is not False:
-                        if y + 1 == self.size[0] - 1:
-                            continue
-                        else:
-                            self.setsegment((y + 1, x + 1), char=c,
-                                            fg=self.fg, bg=self.bg)
-                    else:
-                        self.setsegment((y, x), char=c,
-                                        fg=self.fg, bg=self.bg)
-                else:
-                    break
+            rows = range(self.size[0])
+            x = 0
+        for y, line in zip(rows, wrapped):
+            self.write_text(y, x, line, self.fg, self.bg)
+
+        self._dirty = False
 
     def __str__(self):
         """Return str format summarizing box.
@@ -0,0 +1,126 @@
+"""Wrap Cache.
+
+Remembers how text was laid out into lines, so text boxes don't re-wrap and
+re-justify text that didn't change. Text is laid out a paragraph at a time,
+and paragraphs are cached on their own, so editing long text only re-wraps
+the paragraphs that changed.
+"""
+
+from collections import OrderedDict
+import textwrap
+
+
+class WrapCache:
+    """Wrap Cache.
+
+    Two least recently used caches: whole texts by (text, width, wrap,
+    justify, strip_newlines), and paragraphs by (paragraph, width, wrap,
+    justify). One cache is shared by every TBox.
+
+    """
+
+    def __init__(self, maxsize=128, paragraphs=4096):
+        """WrapCache __init__ method.
+
+        Args:
+            maxsize (int, optional): Number of texts kept. Defaults to 128.
+            paragraphs (int, optional): Number of paragraphs kept.
+                Defaults to 4096.
+
+        Raises:
+            ValueError: If a size is less than 1.
+
+        """
+        if maxsize < 1 or paragraphs < 1:
+            raise ValueError('cache size is less than 1')
+        self.maxsize = maxsize
+        self.maxparagraphs = paragraphs
+        self.texts = OrderedDict()
+        self.paragraphs = OrderedDict()
+        self.hits = 0  # texts found laid out
+        self.misses = 0  # texts laid out again
+        self._wrapper = textwrap.TextWrapper()  # width set on every use
+
+    def layout(self, text, width, wrap=False, justify=None,
+               strip_newlines=False):
+        """Lay text out into lines.
+
+        Without wrap, every newline starts a line. With wrap, every newline
+        starts a paragraph, wrapped to width on its own.
+
+        Args:
+            text (str): Text to lay out.
+            width (int): Width of a line.
+            wrap (bool, optional): Wrap long lines. Defaults to False.
+            justify (str, optional): 'left', 'right', 'center' or None.
+                Defaults to None.
+            strip_newlines (bool, optional): Strip newlines from text first.
+                Defaults to False.
+
+        Returns:
+            tuple: Lines, as str.
+
+        """
+        key = (text, width, wrap, justify, strip_newlines)
+        lines = self.texts.get(key)
+        if lines is not None:
+            self.texts.move_to_end(key)
+            self.hits += 1
+            return lines
+        self.misses += 1
+
+        if strip_newlines:
+            text = text.replace('\n', '')
+        lines = []
+        for paragraph in text.split('\n'):
+            lines.extend(self._paragraph(paragraph, width, wrap, justify))
+        lines = tuple(lines)
+
+        self.texts[key] = lines
+        if len(self.texts) > self.maxsize:
+            self.texts.popitem(last=False)
+        return lines
+
+    def _paragraph(self, paragraph, width, wrap, justify):
+        """Lay a single paragraph out into lines.
+
+        Args:
+            paragraph (str): Text without newlines.
+            width (int): Width of a line.
+            wrap (bool): Wrap long lines.
+            justify (str): 'left', 'right', 'center' or None.
+
+        Returns:
+            tuple: Lines, as str.
+
+        """
+        if not wrap and justify is None:
+            return (paragraph,)
+        key = (paragraph, width, wrap, justify)
+        lines = self.paragraphs.get(key)
+        if lines is not None:
+            self.paragraphs.move_to_end(key)
+            return lines
+
+        if wrap:
+            self._wrapper.width = width
+            lines = self._wrapper.wrap(paragraph) or ['']
+        else:
+            lines = [paragraph]
+        if justify == 'left':
+            lines = [s.ljust(width) for s in lines]
+        elif justify == 'right':
+            lines = [s.rjust(width) for s in lines]
+        elif justify == 'center':
+            lines = [s.center(width) for s in lines]
+        lines = tuple(lines)
+
+        self.paragraphs[key] = lines
+        if len(self.paragraphs) > self.maxparagraphs:
+            self.paragraphs.popitem(last=False)
+        return lines
+
+    def clear(self):
+        """Forget every text and paragraph laid out."""
+        self.texts.clear()
+        self.paragraphs.clear()
@@ -0,0 +1,311 @@
+"""Benchmark static.
+
+Measures how fast the static compositor renders in a range of scenes, with
+frames written to memory instead of the terminal. Each case reports frames
+per second, the mean time of every phase of a frame and the bytes emitted.
+
+Run from this directory:
+    python static_bench.py                      # print results
+    python static_bench.py --save base.json     # save a baseline
+    python static_bench.py --compare base.json  # compare to a baseline
+"""
+
+from static import Compositor, BytesSink
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+PHASES = ('change', 'refresh', 'layout', 'compose', 'render')
+
+
+def run(c, change, frames, warmup=3):
+    """Render frames, changing the scene before each, and time them.
+
+    The phases of composite() are called one at a time so each is timed on
+    its own: boxes are refreshed and laid out before compose() finds them
+    already up to date. Changing the scene is timed too.
+
+    Args:
+        c (Compositor): Compositor writing to a BytesSink.
+        change (callable): Called with the frame number before each frame.
+        frames (int): Number of frames to time.
+        warmup (int, optional): Untimed frames rendered first. Defaults to 3.
+
+    Returns:
+        dict: fps, mean ms per phase and mean bytes per frame.
+
+    """
+    clock = time.perf_counter
+    totals = dict.fromkeys(PHASES, 0.0)
+    sink = c.sink
+
+    for n in range(warmup + frames):
+        if n == warmup:
+            sink.clear()
+            totals = dict.fromkeys(PHASES, 0.0)
+        t = clock()
+        change(n)
+        t0 = clock()
+        for o in c.objectlist:
+            o.refresh()
+        t1 = clock()
+        c.layout()
+        t2 = clock()
+        c.compose()
+        t3 = clock()
+        c.render()
+        t4 = clock()
+        totals['change'] += t0 - t  # setters that update boxes right away
+        totals['refresh'] += t1 - t0
+        totals['layout'] += t2 - t1
+        totals['compose'] += t3 - t2
+        totals['render'] += t4 - t3
+
+    total = sum(totals.values())
+    return {
+        'fps': frames / total if total else float('inf'),
+        'ms': {k: v * 1000 / frames for k, v in totals.items()},
+        'bytes': len(sink.getvalue()) / frames,
+    }
+
+
+def scatter(rng, c, count, size, overlay=0.0):
+    """Make boxes of a given size at random positions.
+
+    Args:
+        rng (random.Random): Random source.
+        c (Compositor): Compositor to place boxes in.
+        count (int): Number of boxes.
+        size (tuple): (height, width) of each box.
+        overlay (float, optional): Share of boxes that are overlay boxes.
+            Defaults to 0.0.
+
+    Returns:
+        list: Boxes made.
+
+    """
+    h, w = c.size
+    boxes = []
+    for i in range(count):
+        box = c.makedbox(
+            name='box{}'.format(i),
+            pos=(rng.randrange(h - size[0] + 1),
+                 rng.randrange(w - size[1] + 1)),
+            size=size,
+            overlay=i < count * overlay,
+            fg=rng.choice(['red', 'green', 'blue', 'default']),
+            defaultpoints=True)
+        boxes.append(box)
+    return boxes
+
+
+def bench_size(rng, frames):
+    """Composite throughput by terminal size and box count."""
+    results = {}
+    for size in [(24, 80), (50, 160), (100, 300)]:
+        for count in [1, 10, 50]:
+            c = Compositor(size, sink=BytesSink())
+            boxes = scatter(rng, c, count, (8, 20))
+
+            def change(n):
+                box = boxes[n % count]
+                h, w = c.size
+                box.pos = (rng.randrange(h - 7), rng.randrange(w - 19))
+
+            name = 'size {}x{} boxes {}'.format(size[0], size[1], count)
+            results[name] = run(c, change, frames)
+    return results
+
+
+def bench_full(rng, frames):
+    """Full repaints, as after a resize or invalidate()."""
+    results = {}
+    for size in [(24, 80), (50, 160), (100, 300)]:
+        c = Compositor(size, sink=BytesSink())
+        scatter(rng, c, 20, (8, 20))
+
+        def change(n):
+            c.full = True
+            c.invalidate()
+
+        name = 'full {}x{}'.format(*size)
+        results[name] = run(c, change, frames)
+    return results
+
+
+def bench_overlay(rng, frames):
+    """Share of overlay boxes in a stack of overlapping boxes."""
+    results = {}
+    for ratio in [0.0, 0.5, 1.0]:
+        c = Compositor((50, 160), sink=BytesSink())
+        boxes = scatter(rng, c, 30, (20, 50), overlay=ratio)
+
+        def change(n):
+            boxes[n % len(boxes)].touch()
+
+        name = 'overlay {:.0%}'.format(ratio)
+        results[name] = run(c, change, frames)
+    return results
+
+
+def bench_points(rng, frames):
+    """DBox redraws by point density."""
+    results = {}
+    for density in [0.001, 0.01, 0.05]:
+        c = Compositor((50, 160), sink=BytesSink())
+        box = c.makedbox(name='points', size=(50, 160))
+        h, w = box.size
+        count = int(h * w * density)
+        box.addpoints(*[(rng.randrange(h), rng.randrange(w))
+                        for i in range(count)])
+
+        def change(n):
+            box.addpoint((rng.randrange(h), rng.randrange(w)))
+
+        name = 'points {} ({:.1%})'.format(count, density)
+        results[name] = run(c, change, frames)
+    return results
+
+
+def bench_text(rng, frames):
+    """TBox text length, with and without wrap."""
+    words = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur',
+             'adipiscing', 'elit', 'sed', 'do', 'eiusmod', 'tempor']
+    results = {}
+    for length in [100, 1000, 5000]:
+        text = ''
+        while len(text) < length:
+            text += rng.choice(words) + ('\n' if rng.random() < 0.1 else ' ')
+        for wrap in [False, True]:
+            c = Compositor((50, 160), sink=BytesSink())
+            box = c.maketbox(name='text', size=(48, 80), text=text,
+                             wrap=wrap, border='default')
+
+            def change(n):
+                box.text = ('' if n % 2 else 'x ') + text
+
+            name = 'text {} wrap {}'.format(length, 'on' if wrap else 'off')
+            results[name] = run(c, change, frames)
+    return results
+
+
+def bench_chain(rng, frames):
+    """Alignment chain depth, moving the box everything aligns to."""
+    results = {}
+    for depth in [1, 10, 50]:
+        c = Compositor((50, 160), sink=BytesSink())
+        root = c.makebox(name='root', pos=(0, 0), size=(1, 2), dchar='#')
+        last = root
+        for i in range(depth):
+            last = c.makebox(name='link{}'.format(i), size=(1, 2), dchar='=',
+                             ytarget=last, ytalign='top', ysalign='top',
+                             xtarget=last, xtalign='oright', xsalign='aleft')
+
+        def change(n):
+            root.pos = (n % 40, 0)
+
+        name = 'chain {}'.format(depth)
+        results[name] = run(c, change, frames)
+    return results
+
+
+BENCHES = {
+    'size': bench_size,
+    'full': bench_full,
+    'overlay': bench_overlay,
+    'points': bench_points,
+    'text': bench_text,
+    'chain': bench_chain,
+}
+
+
+def report(results, baseline=None, threshold=0.2):
+    """Print results, compared to a baseline if there is one.
+
+    Args:
+        results (dict): Case name to result.
+        baseline (dict, optional): Saved results to compare to.
+            Defaults to None.
+        threshold (float, optional): Slowdown marked as a regression.
+            Defaults to 0.2.
+
+    Returns:
+        int: Number of regressions.
+
+    """
+    regressions = 0
+    print('{:<28}{:>10}{:>10}'.format('case', 'fps', 'bytes') + ''.join(
+        '{:>12}'.format(p + ' ms') for p in PHASES))
+    for name, result in results.items():
+        line = '{:<28}{:>10.1f}{:>10.0f}'.format(
+            name, result['fps'], result['bytes']) + ''.join(
+            '{:>12.3f}'.format(result['ms'][p]) for p in PHASES)
+        old = (baseline or {}).get(name)
+        if old is not None:
+            change = result['fps'] / old['fps'] - 1
+            line += '{:>+9.0%}'.format(change)
+            if change < -threshold:
+                line += ' REGRESSION'
+                regressions += 1
+        print(line)
+    return regressions
+
+
+def main(argv=None):
+    """Run benchmarks from the command line.
+
+    Returns:
+        int: Exit status, 1 if compared to a baseline and slower.
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('benches', nargs='*', metavar='bench',
+                        help='benchmarks to run, all by default: ' +
+                        ', '.join(BENCHES))
+    parser.add_argument('--frames', type=int, default=50,
+                        help='frames timed per case')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', metavar='JSON',
+                        help='save results as a baseline')
+    parser.add_argument('--compare', metavar='JSON',
+                        help='compare results to a saved baseline')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='fps drop counted as a regression')
+    args = parser.parse_args(argv)
+    unknown = [b for b in args.benches if b not in BENCHES]
+    if unknown:
+        parser.error('unknown benchmark: ' + ', '.join(unknown))
+
+    results = {}
+    for name in args.benches or BENCHES:
+        results.update(BENCHES[name](random.Random(args.seed), args.frames))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    regressions = report(results, baseline, args.threshold)
+
+    if args.save:
+        try:
+            import numpy
+            numpy_version = numpy.__version__
+        except ImportError:
+            numpy_version = None
+        with open(args.save, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'numpy': numpy_version,
+                'frames': args.frames,
+                'seed': args.seed,
+                'results': results,
+            }, f, indent=2)
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
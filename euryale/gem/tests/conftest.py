@@ -0,0 +1,16 @@
+"""Fixtures shared by the gem tests."""
+
+import pytest
+
+from euryale.gem.static import framebuffer
+
+
+@pytest.fixture(params=['numpy', 'array'])
+def backend(request, monkeypatch):
+    """Run a test with NumPy buffers and again with the array module."""
+    if request.param == 'numpy':
+        if framebuffer.np is None:
+            pytest.skip('numpy is not installed')
+    else:
+        monkeypatch.setattr(framebuffer, 'np', None)
+    return request.param
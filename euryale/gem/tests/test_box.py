@@ -0,0 +1,145 @@
+"""Tests for Box."""
+
+import pytest
+
+from euryale.gem.static import BytesSink, Compositor
+
+
+def compositor(size=(8, 20)):
+    return Compositor(size, sink=BytesSink())
+
+
+def text(box):
+    return box.grid.to_string(color=False).split('\n')
+
+
+def test_lines_and_fills_are_clipped_and_inclusive(backend):
+    c = compositor()
+    box = c.makebox(name='box', size=(4, 6), dchar='.')
+    box.hline(0, -2, 2, '-')
+    box.vline(5, 1, 9, '|', fg='red')
+    box.fill_rect((2, 1), (3, 2), '#')
+    assert text(box) == ['---...',
+                         '.....|',
+                         '.##..|',
+                         '.##..|']
+    assert box.grid.get(1, 5) == ('|', '31', '40')
+    assert box.damaged
+
+
+@pytest.mark.parametrize('stroke, rows', [
+    (1, ['#####', '#...#', '#...#', '#####']),
+    (2, ['#####', '#####', '#####', '#####']),
+])
+def test_stroke_rect_draws_edges(backend, stroke, rows):
+    c = compositor()
+    box = c.makebox(name='box', size=(4, 5), dchar='.')
+    box.stroke_rect((0, 0), (3, 4), '#', stroke=stroke)
+    assert text(box) == rows
+
+
+def test_rectangle_strokes_and_inlays(backend):
+    c = compositor()
+    box = c.makebox(name='box', size=(6, 8), dchar='.')
+    box.rectangle((0, 1), (5, 6), '#', stroke=1, inlay='~', inlay_bg='blue')
+    assert text(box) == ['.######.',
+                         '.#~~~~#.',
+                         '.#~~~~#.',
+                         '.#~~~~#.',
+                         '.#~~~~#.',
+                         '.######.']
+    assert box.grid.get(2, 3)[2] == '44'
+    assert box.grid.get(0, 3)[2] == '40'
+
+
+def test_rectangle_too_small_to_stroke_is_filled(backend):
+    c = compositor()
+    box = c.makebox(name='box', size=(3, 8), dchar='.')
+    box.rectangle((0, 0), (2, 7), '#', stroke=1, inlay='~')
+    assert text(box) == ['########'] * 3
+
+
+def test_mask_is_kept_until_the_box_changes(backend):
+    c = compositor()
+    box = c.makebox(name='box', size=(1, 4), overlay=True)
+    box.write_text(0, 1, 'a\tb')
+    mask = box.mask
+    assert list(mask) == [1, 0, 1, 0]
+    assert box.mask is mask
+
+    box.setsegment((0, 0), 'x')
+    assert box.mask is not mask
+    assert list(box.mask) == [0, 0, 1, 0]
+
+
+def test_children_are_drawn_inside_and_move_with_their_container(backend):
+    c = compositor((4, 8))
+    panel = c.makebox(name='panel', pos=(1, 1), size=(2, 4), dchar='.')
+    c.makebox(name='child', container=panel, pos=(1, 2), size=(2, 3),
+              dchar='c')
+    c.makebox(name='low', container=panel, height='bottom', size=(2, 2),
+              dchar='l')
+    c.composite()
+    assert c.grid.to_string(color=False).split('\n') == ['        ',
+                                                         ' ll..   ',
+                                                         ' llcc   ',
+                                                         '        ']
+    panel.pos = (2, 4)
+    c.composite()
+    assert c.grid.to_string(color=False).split('\n') == ['        ',
+                                                         '        ',
+                                                         '    ll..',
+                                                         '    llcc']
+
+
+def test_surfaces_are_kept_until_something_inside_changes(backend):
+    c = compositor((2, 4))
+    panel = c.makebox(name='panel', size=(2, 4), dchar='.')
+    child = c.makebox(name='child', container=panel, size=(1, 2), dchar='c')
+    surface = panel.surface
+    assert surface.to_string(color=False) == 'cc..\n....'
+
+    # written around touch(), so only seen once the child is touched
+    child.grid.set(0, 0, 'x')
+    assert panel.surface is surface
+    assert surface.to_string(color=False) == 'cc..\n....'
+    child.touch()
+    assert panel.surface.to_string(color=False) == 'xc..\n....'
+
+    child.pos = (1, 2)
+    assert panel.surface.to_string(color=False) == '....\n..xc'
+    panel.remove(child)
+    assert panel.surface.to_string(color=False) == '....\n....'
+
+
+def test_alignment_across_containers_is_rejected():
+    c = compositor()
+    panel = c.makebox(name='panel', size=(4, 4))
+    child = c.makebox(name='child', container=panel, size=(1, 1))
+    outside = c.makebox(name='outside', size=(1, 1), ytarget=child)
+    with pytest.raises(ValueError):
+        c.layout()
+    outside.ytarget = panel
+    c.layout()
+
+    child.xtarget = outside
+    with pytest.raises(ValueError):
+        child.pos
+    child.xtarget = panel
+    assert child.pos == (0, 2)
+    with pytest.raises(ValueError):
+        panel.add(panel)
+
+
+def test_write_text_clips_and_touches_only_when_it_writes(backend):
+    c = compositor()
+    box = c.makebox(name='box', size=(2, 5), dchar='.')
+    c.composite()
+    assert box.write_text(0, -2, 'abcdefg', fg='red') == 5
+    assert box.damaged
+    c.composite()
+    assert box.write_text(2, 0, 'xyz') == 0
+    assert box.write_text(1, 5, 'xyz') == 0
+    assert not box.damaged
+    assert text(box) == ['cdefg', '.....']
+    assert box.grid.get(0, 0) == ('c', '31', '40')
@@ -0,0 +1,281 @@
+"""Tests for Compositor."""
+
+import random
+
+import pytest
+
+from euryale.gem.static import BytesSink, Compositor
+
+from .vt import Terminal
+
+
+def compositor(size=(8, 20)):
+    return Compositor(size, sink=BytesSink())
+
+
+def names(c):
+    return [o.name for o in c.objectlist]
+
+
+def test_boxes_stack_by_height():
+    c = compositor()
+    c.makebox(name='a', size=(1, 1))
+    c.makebox(name='b', size=(1, 1))
+    c.makebox(name='c', size=(1, 1), height='bottom')
+    c.makebox(name='d', size=(1, 1), height='above a')
+    c.makebox(name='e', size=(1, 1), height='below c')
+    c.makebox(name='f', size=(1, 1), height=1)
+    assert names(c) == ['e', 'f', 'c', 'a', 'd', 'b']
+
+
+def test_move_restacks_a_box():
+    c = compositor()
+    for name in 'abc':
+        c.makebox(name=name, size=(1, 1))
+    c.move('a', 'top')
+    assert names(c) == ['b', 'c', 'a']
+    c.move(c.getobject('a'), 'below b')
+    assert names(c) == ['a', 'b', 'c']
+    with pytest.raises(ValueError):
+        c.move('a', 'above nothing')
+    assert names(c) == ['a', 'b', 'c']
+
+
+def test_many_insertions_between_two_boxes_keep_order():
+    c = compositor()
+    c.makebox(name='low', size=(1, 1))
+    c.makebox(name='high', size=(1, 1))
+    for n in range(100):
+        c.makebox(name='mid{}'.format(n), size=(1, 1), height='below high')
+    assert names(c) == ['low'] + ['mid{}'.format(n)
+                                  for n in range(100)] + ['high']
+
+
+def test_names_are_unique():
+    c = compositor()
+    c.makebox(name='a', size=(1, 1))
+    with pytest.raises(ValueError):
+        c.makebox(name='a', size=(1, 1))
+    assert names(c) == ['a']
+
+
+def test_failed_place_of_a_placed_box_keeps_its_name():
+    c = compositor()
+    box = c.makebox(name='a', size=(1, 1))
+    with pytest.raises(ValueError):
+        c.place_object(box, 'above nothing')
+    assert c.getobject('a') is box
+    assert names(c) == ['a']
+
+
+def test_failed_place_of_a_new_box_releases_its_name():
+    c = compositor()
+    with pytest.raises(ValueError):
+        c.makebox(name='a', size=(1, 1), height='above nothing')
+    assert c.getobject('a') is None
+
+
+def test_removeobject_releases_subtree_and_links():
+    c = compositor()
+    panel = c.makebox(name='panel', size=(4, 4))
+    child = c.makebox(name='child', container=panel, size=(1, 1))
+    follower = c.makebox(name='follower', size=(1, 1), ytarget=panel,
+                         xtarget=panel)
+
+    assert c.removeobject('panel')
+
+    assert c.getobject('panel') is None and c.getobject('child') is None
+    assert names(c) == ['follower']
+    assert follower.ytarget is None and follower.xtarget is None
+    assert child.container is panel
+    assert not c.removeobject('panel')
+    c.makebox(name='panel', size=(1, 1))
+
+
+def test_unstack_keeps_the_name():
+    c = compositor()
+    box = c.makebox(name='a', size=(1, 1))
+    assert c.unstack(box)
+    assert not c.unstack(box)
+    assert names(c) == [] and c.getobject('a') is box
+
+
+def test_observers_get_stats_of_every_frame():
+    c = compositor()
+    box = c.makebox(name='a', size=(2, 3), dchar='x')
+    frames = []
+    c.observe(frames.append)
+    c.composite()
+    box.pos = (1, 1)
+    c.composite()
+    c.composite()  # nothing changed
+
+    assert [s.frame for s in frames] == [1, 2, 3]
+    first, moved, idle = frames
+    assert first.boxes == 1 and first.bytes > 0 and first.cells > 0
+    assert moved.boxes == 1 and moved.bytes > 0
+    assert idle.boxes == 0 and idle.bytes == 0
+    assert all(s.total >= 0 for s in frames)
+
+    assert c.unobserve(frames.append)
+    assert not c.unobserve(frames.append)
+    c.composite()
+    assert len(frames) == 3
+
+
+def test_stats_box_fits_the_stats_and_takes_a_free_name():
+    c = compositor((20, 60))
+    c.makebox(name='stats', size=(1, 1))
+    c.show_stats()
+    for n in range(3):
+        c.composite()
+    lines = str(c.statsbox.text).split('\n')
+    assert c.statsbox.size[0] >= len(lines)
+    assert c.statsbox.size[1] >= max(len(line) for line in lines)
+    assert c.getobject('stats') is not c.statsbox
+    assert c.getobject(c.statsbox.name) is c.statsbox
+
+    c.show_stats(False)
+    assert c.statsbox is None and c.observers == []
+    assert names(c) == ['stats']
+
+
+def reference(c):
+    """Composite every box over the background, bottom to top."""
+    grid = c.blank.copy()
+    for o in c.objectlist:
+        grid.blit(o.surface, o.pos, mask=o.mask if o.overlay else None)
+    return grid
+
+
+def test_only_changed_areas_are_damaged():
+    c = compositor()
+    box = c.makebox(name='a', size=(2, 3), dchar='x')
+    c.makebox(name='b', pos=(6, 15), size=(1, 2), dchar='y')
+    c.compose()
+    assert c.damaged == [(0, 0, 8, 20)]
+    c.render()
+    assert c.damaged == []
+
+    c.compose()
+    assert c.damaged == []
+
+    box.pos = (4, 10)
+    c.compose()
+    assert c.damaged == [(0, 0, 2, 3), (4, 10, 6, 13)]
+
+    box.setarea((0, 0), (0, 0), 'z')
+    c.compose()  # added to what isn't rendered yet
+    assert c.damaged == [(0, 0, 2, 3), (4, 10, 6, 13)]
+    c.render()
+    c.removeobject('b')
+    c.compose()
+    assert c.damaged == [(6, 15, 7, 17)]
+
+
+def test_incremental_frames_match_a_full_composite(backend):
+    rng = random.Random(6)
+    sink = BytesSink()
+    c = Compositor((10, 24), sink=sink, rows=10)
+    term = Terminal(c.size)
+
+    def make(name):
+        box = c.makebox(name=name, size=(rng.randint(1, 5), rng.randint(1, 9)),
+                        pos=(rng.randint(-2, 9), rng.randint(-2, 22)),
+                        dchar=rng.choice(' .:'), overlay=rng.random() < 0.4)
+        box.fill_rect((0, 0), (0, 0), rng.choice('ab'), bg='blue')
+        return box
+
+    for name in 'abcdef':
+        make(name)
+    for _ in range(150):
+        box = rng.choice(c.objectlist)
+        action = rng.randrange(5)
+        if action == 0:
+            box.pos = (rng.randint(-2, 9), rng.randint(-2, 22))
+        elif action == 1:
+            y, x = rng.randrange(box.size[0]), rng.randrange(box.size[1])
+            box.fill_rect((y, x), (y + rng.randint(0, 2), x + 3),
+                          rng.choice(' #@'), rng.choice(['red', None]),
+                          rng.choice(['green', 'default', None]))
+        elif action == 2:
+            c.move(box, rng.choice(['top', 'bottom']))
+        elif action == 3:
+            box.resize((rng.randint(1, 5), rng.randint(1, 9)))
+        else:
+            c.removeobject(box.name)
+            make(box.name)
+
+        c.composite()
+        term.feed(sink.getvalue())
+        sink.clear()
+        assert c.grid.diff(reference(c)) == []
+        assert term.shows(c.grid) == []
+
+    before = c.grid.copy()
+    c.full = True
+    c.compose()
+    assert c.grid.diff(before) == []
+
+
+def test_boxes_hidden_by_opaque_boxes_are_skipped():
+    c = compositor()
+    hidden = c.makebox(name='hidden', pos=(1, 1), size=(2, 2), dchar='h')
+    part = c.makebox(name='part', pos=(1, 2), size=(2, 4), dchar='p')
+    glass = c.makebox(name='glass', pos=(0, 0), size=(8, 2), overlay=True)
+    top = c.makebox(name='top', pos=(0, 0), size=(4, 4), dchar='t')
+
+    found = dict(c.visible([(0, 0, 8, 20)]))
+    assert hidden not in found
+    assert found[part] == [(1, 4, 6), (2, 4, 6)]
+    assert found[glass] == [(y, 0, 2) for y in range(4, 8)]
+    assert found[top] == [(y, 0, 4) for y in range(4)]
+    assert list(found) == [part, glass, top]
+
+    frames = []
+    c.observe(frames.append)
+    c.composite()
+    assert (frames[0].boxes, frames[0].skipped) == (3, 1)
+    assert c.grid.to_string(color=False).split('\n')[1][:7] == 'ttttpp '
+
+
+def test_overlays_show_what_is_below_their_blanks(backend):
+    c = compositor((2, 6))
+    under = c.makebox(name='under', size=(2, 6), dchar='u')
+    under.fill_rect((0, 0), (1, 5), fg='red')
+    glass = c.makebox(name='glass', size=(2, 4), overlay=True)
+    glass.fill_rect((0, 0), (1, 3), bg='blue')
+    glass.write_text(0, 1, 'gg', fg='green')
+    c.composite()
+    assert c.grid.to_string(color=False) == 'ugguuu\nuuuuuu'
+    assert c.grid.get(0, 0) == ('u', '31', '44')
+    assert c.grid.get(0, 1) == ('g', '32', '44')
+    assert c.grid.get(0, 4) == ('u', '31', '40')
+
+    glass.overlay = False
+    glass.touch()
+    c.composite()
+    assert c.grid.to_string(color=False) == ' gg uu\n    uu'
+
+
+@pytest.mark.parametrize('pos, rows', [
+    ((-1, -2), ['xx  ', '    ', '    ']),
+    ((2, 2), ['    ', '    ', '  xx']),
+    ((-2, 0), ['    ', '    ', '    ']),
+    ((1, 9), ['    ', '    ', '    ']),
+])
+def test_to_grid_clips_boxes_off_the_grid(backend, pos, rows):
+    c = compositor((3, 4))
+    box = c.makebox(name='box', pos=pos, size=(2, 4), dchar='x')
+    c.clear()
+    c.to_grid(box)
+    assert c.grid.to_string(color=False).split('\n') == rows
+
+
+def test_to_grid_clips_to_a_rect(backend):
+    c = compositor((3, 4))
+    box = c.makebox(name='box', size=(3, 4), dchar='x')
+    c.clear()
+    c.to_grid(box, (1, 1, 2, 9))
+    assert c.grid.to_string(color=False).split('\n') == ['    ', ' xxx',
+                                                          '    ']
@@ -0,0 +1,132 @@
+"""Tests for DBox."""
+
+import random
+
+import pytest
+
+from euryale.gem.static import BytesSink, Compositor
+from euryale.gem.static.dbox import junctions
+
+
+def compositor(size=(10, 20)):
+    return Compositor(size, sink=BytesSink())
+
+
+def count_updates(monkeypatch, box):
+    updates = []
+
+    def update(update=box.update):
+        updates.append(box.name)
+        update()
+    monkeypatch.setattr(box, 'update', update)
+    return updates
+
+
+def test_dbox_updates_only_when_its_inputs_change(monkeypatch):
+    c = compositor()
+    d = c.makedbox(name='d', size=(3, 4), defaultpoints=True)
+    updates = count_updates(monkeypatch, d)
+    c.composite()
+    assert updates == [] and not d.dirty
+
+    d.style = 'default'
+    d.fg = 'default'
+    d.addpoints((0, 0))  # already there
+    c.composite()
+    assert updates == []
+
+    d.addpoints((1, 0), (1, 3), silent=True)
+    d.style = ('double', True)
+    assert d.dirty and updates == []
+    assert c.render_to_string(color=False).split('\n')[:3] == [
+        '╔══╗' + ' ' * 16,
+        '╠══╣' + ' ' * 16,
+        '╚══╝' + ' ' * 16]
+    assert updates == ['d'] and not d.dirty
+    assert not d.refresh()
+
+
+def text(box):
+    return box.grid.to_string(color=False).split('\n')
+
+
+def test_points_are_joined_with_junctions():
+    c = compositor()
+    d = c.makedbox(name='d', size=(5, 9), defaultpoints=True)
+    d.addpoints((0, 4), (4, 4), (2, 0), (2, 8), (2, 4), (2, 4))
+    assert text(d) == ['┌───┬───┐',
+                       '│   │   │',
+                       '├───┼───┤',
+                       '│   │   │',
+                       '└───┴───┘']
+
+    d.removepoints((0, 0))
+    assert text(d) == ['    ┌───┐',
+                       '    │   │',
+                       '┌───┼───┤',
+                       '│   │   │',
+                       '└───┴───┘']
+
+
+def test_random_points_match_a_full_scan():
+    rng = random.Random(7)
+    c = compositor()
+    for n in range(30):
+        h, w = rng.randint(1, 9), rng.randint(1, 19)
+        d = c.makedbox(name='d{}'.format(n), size=(h, w))
+        points = {(rng.randrange(h), rng.randrange(w))
+                  for _ in range(rng.randint(0, 12))}
+        d.addpoints(*points)
+        table = junctions(d.style)
+
+        for y, x in points:
+            row = [px for py, px in points if py == y]
+            col = [py for py, px in points if px == x]
+            right = [px for px in row if px > x]
+            down = [py for py in col if py > y]
+            # left, up, right and down neighbours
+            bits = (min(row) < x) | (min(col) < y) << 1
+            bits |= bool(right) << 2 | bool(down) << 3
+            if table[bits] is not None:
+                assert d.grid.get(y, x)[0] == table[bits]
+            # horizontal lines win where lines cross
+            for lx in range(x + 1, min(right, default=x + 1)):
+                assert d.grid.get(y, lx)[0] == d.style[0]
+            for ly in range(y + 1, min(down, default=y + 1)):
+                if d.grid.get(ly, x)[0] != d.style[0]:
+                    assert d.grid.get(ly, x)[0] == d.style[1]
+
+
+def test_batch_updates_once_on_the_way_out(monkeypatch):
+    c = compositor()
+    d = c.makedbox(name='d', size=(5, 9), defaultpoints=True)
+    updates = count_updates(monkeypatch, d)
+    with d.batch():
+        d.addpoints((0, 4), (4, 4))
+        with d.batch():
+            d.style = 'double'
+            d.fg = 'red'
+        assert updates == [] and d.dirty
+    assert updates == ['d'] and not d.dirty
+    assert text(d)[0] == '╔═══╦═══╗'
+
+    with pytest.raises(RuntimeError):
+        with d.batch():
+            d.addpoint((2, 0))
+            raise RuntimeError('boom')
+    assert not d.batching and updates == ['d', 'd']
+
+
+def test_compositor_batch_defers_every_box(monkeypatch):
+    c = compositor()
+    with c.batch():
+        a = c.makedbox(name='a', size=(3, 3), defaultpoints=True)
+        b = c.maketbox(name='b', size=(1, 5), text='hi')
+        assert a.dirty and b.dirty
+        a_updates = count_updates(monkeypatch, a)
+        b_updates = count_updates(monkeypatch, b)
+        a.addpoint((1, 0))
+        b.text = 'there'
+        assert a_updates == [] and b_updates == []
+    assert a_updates == ['a'] and b_updates == ['b']
+    assert text(b) == ['there']
@@ -0,0 +1,79 @@
+"""Tests for Encoder, replayed on a small terminal emulator."""
+
+import random
+
+import pytest
+
+from euryale.gem.static import BytesSink, Compositor, FrameBuffer
+from euryale.gem.static.encoder import Encoder
+
+from .vt import Terminal
+
+COLORS = ['red', 'green', 'blue', 'default']
+
+
+def scribble(rng, buf, count):
+    """Change a few random runs of cells, often to blanks."""
+    h, w = buf.size
+    for _ in range(count):
+        y = rng.randrange(h)
+        x = rng.randrange(w)
+        n = rng.randint(1, w)
+        char = rng.choice(' ' * 3 + 'ab#')
+        buf.fill_rect((y, x, y + 1, x + n), char, rng.choice(COLORS),
+                      rng.choice(COLORS))
+
+
+@pytest.mark.parametrize('erase', [True, False])
+def test_diff_then_encode_round_trips(backend, erase):
+    rng = random.Random(4)
+    encoder = Encoder(erase=erase)
+    for size in [(6, 12), (10, 30), (1, 7)]:
+        term = Terminal(size)
+        front = FrameBuffer(size)
+        scribble(rng, front, 10)
+        term.feed(encoder.encode(front, [(y, 0, size[1])
+                                         for y in range(size[0])],
+                                 clear=True, park=False))
+        assert term.shows(front) == []
+        for _ in range(30):
+            back = front.copy()
+            scribble(rng, back, rng.randint(0, 5))
+            term.feed(encoder.encode(back, back.diff(front), park=False))
+            assert term.shows(back) == []
+            front = back
+
+
+def test_encode_nothing_is_empty():
+    assert Encoder().encode(FrameBuffer((2, 2)), []) == b''
+
+
+def test_park_moves_below_frame():
+    grid = FrameBuffer((3, 4), 'x')
+    spans = [(0, 0, 4)]
+    assert Encoder().encode(grid, spans).endswith(b'\033[4;1H\033[J')
+    assert b'\033[J' not in Encoder().encode(grid, spans, park=False)
+
+
+@pytest.mark.parametrize('kwargs', [{'rows': 6}, {'fullscreen': True}])
+def test_last_row_survives_frames_at_terminal_height(kwargs):
+    sink = BytesSink()
+    c = Compositor((6, 10), sink=sink, **kwargs)
+    box = c.makebox(name='bottom', pos=(5, 0), size=(1, 10), dchar='#')
+    top = c.makebox(name='top', pos=(0, 0), size=(1, 10), dchar='=')
+    term = Terminal(c.size)
+    for n in range(4):
+        top.setarea((0, 0), (0, 9), '-=+'[n % 3])
+        if n == 2:
+            box.setarea((0, 0), (0, 9), '@')
+        c.composite()
+        term.feed(sink.getvalue())
+        sink.clear()
+        assert term.shows(c.grid) == []
+
+
+def test_parks_only_with_a_row_below():
+    assert Compositor((6, 10), sink=BytesSink(), rows=7).parks(
+        FrameBuffer((6, 10)))
+    assert not Compositor((6, 10), sink=BytesSink(), rows=6).parks(
+        FrameBuffer((6, 10)))
@@ -0,0 +1,156 @@
+"""Tests for FrameBuffer, under both the NumPy and array backends."""
+
+import random
+
+import pytest
+
+from euryale.gem.static import FrameBuffer
+
+COLORS = ['red', 'green', 'blue', 'default']
+
+
+def cells(buf):
+    """Get every cell of a buffer as rows of (char, fg, bg)."""
+    h, w = buf.size
+    return [[buf.get(y, x) for x in range(w)] for y in range(h)]
+
+
+def random_buffer(rng, size):
+    buf = FrameBuffer(size)
+    for y in range(size[0]):
+        for x in range(size[1]):
+            buf.set(y, x, rng.choice('ab  #'), rng.choice(COLORS),
+                    rng.choice(COLORS))
+    return buf
+
+
+def test_fill_rect_matches_reference(backend):
+    rng = random.Random(1)
+    for _ in range(200):
+        h, w = rng.randint(1, 8), rng.randint(1, 8)
+        buf = random_buffer(rng, (h, w))
+        expected = cells(buf)
+        y1, y2 = sorted(rng.randint(-3, h + 3) for _ in range(2))
+        x1, x2 = sorted(rng.randint(-3, w + 3) for _ in range(2))
+        char = rng.choice([None, 'x'])
+        fg = rng.choice([None, 'red'])
+        bg = rng.choice([None, 'blue'])
+
+        buf.fill_rect((y1, x1, y2, x2), char, fg, bg)
+
+        new = FrameBuffer((1, 1), char or ' ', fg or 'default',
+                          bg or 'default').get(0, 0)
+        for y in range(max(0, y1), min(h, y2)):
+            for x in range(max(0, x1), min(w, x2)):
+                old = expected[y][x]
+                expected[y][x] = (new[0] if char else old[0],
+                                  new[1] if fg else old[1],
+                                  new[2] if bg else old[2])
+        assert cells(buf) == expected
+
+
+@pytest.mark.parametrize('overlay', [False, True])
+def test_blit_matches_reference(backend, overlay):
+    rng = random.Random(2)
+    for _ in range(200):
+        dst = random_buffer(rng, (rng.randint(1, 8), rng.randint(1, 8)))
+        src = random_buffer(rng, (rng.randint(1, 8), rng.randint(1, 8)))
+        pos = (rng.randint(-4, 8), rng.randint(-4, 8))
+        clip = rng.choice([None, (1, 1, 5, 6)])
+        mask = src.transparent() if overlay else None
+        expected = cells(dst)
+        for y, row in enumerate(cells(src)):
+            for x, (char, fg, bg) in enumerate(row):
+                dy, dx = y + pos[0], x + pos[1]
+                if not (0 <= dy < dst.size[0] and 0 <= dx < dst.size[1]):
+                    continue
+                if clip is not None and not (clip[0] <= dy < clip[2]
+                                             and clip[1] <= dx < clip[3]):
+                    continue
+                if overlay and char == ' ':
+                    old = expected[dy][dx]
+                    expected[dy][dx] = (old[0], old[1], bg)
+                else:
+                    expected[dy][dx] = (char, fg, bg)
+
+        dst.blit(src, pos, clip, mask)
+
+        assert cells(dst) == expected
+
+
+@pytest.mark.parametrize('size', [(3, 4), (6, 4), (3, 7), (6, 7), (2, 2),
+                                  (5, 9), (0, 0)])
+def test_resize_keeps_overlap_and_fills_new_cells(backend, size):
+    buf = random_buffer(random.Random(3), (4, 5))
+    before = cells(buf)
+
+    buf.resize(size, '.', 'red', 'blue')
+
+    assert buf.size == size
+    new = ('.', '31', '44')
+    expected = [[before[y][x] if y < 4 and x < 5 else new
+                 for x in range(size[1])] for y in range(size[0])]
+    assert cells(buf) == expected
+
+
+def test_resize_leaves_views_of_old_arrays_valid(backend):
+    buf = FrameBuffer((4, 5), 'x')
+    view = buf.chars[2:8]
+    before = view.tolist()
+
+    # grown past capacity, so the old memory is left alone
+    buf.resize((10, 20))
+    buf.fill('y')
+
+    assert view.tolist() == before
+
+
+def test_resize_reuses_buffers_within_capacity(backend):
+    buf = FrameBuffer((10, 20), 'x')
+    buf.resize((30, 40))
+    chars = buf.chars
+    for size in [(5, 7), (30, 40), (12, 33), (29, 11), (30, 40)]:
+        buf.resize(size, '.')
+        if backend == 'numpy':
+            assert buf.chars.ctypes.data == chars.ctypes.data
+        else:
+            assert buf.chars is chars
+
+
+def test_write_clips_to_row():
+    buf = FrameBuffer((2, 5), '.')
+    assert buf.write(0, -2, 'abcdefg', fg='red') == 5
+    assert buf.write(1, 3, 'xyz') == 2
+    assert buf.write(1, 5, 'xyz') == 0
+    assert buf.write(2, 0, 'xyz') == 0
+    assert buf.to_string(color=False) == 'cdefg\n...xy'
+    assert buf.get(0, 0) == ('c', '31', '40')
+
+
+def test_diff_finds_changed_spans(backend):
+    a = FrameBuffer((3, 10))
+    b = a.copy()
+    b.write(0, 2, 'ab')
+    b.set(2, 9, bg='red')
+    b.set(2, 0, fg='green')
+
+    assert b.diff(a) == [(0, 2, 4), (2, 0, 1), (2, 9, 10)]
+    assert b.diff(a, [(0, 0, 2, 10)]) == [(0, 2, 4)]
+    assert a.diff(a.copy()) == []
+
+
+def test_resize_sequence_matches_reference(backend):
+    rng = random.Random(5)
+    buf = random_buffer(rng, (5, 5))
+    expected = cells(buf)
+    for _ in range(100):
+        size = (rng.randint(0, 12), rng.randint(0, 12))
+        buf.resize(size, '.')
+        expected = [[expected[y][x] if y < len(expected)
+                     and x < len(expected[y]) else ('.', '37', '40')
+                     for x in range(size[1])] for y in range(size[0])]
+        assert cells(buf) == expected
+        if size[0] and size[1]:
+            y, x = rng.randrange(size[0]), rng.randrange(size[1])
+            buf.set(y, x, 'z')
+            expected[y][x] = ('z',) + expected[y][x][1:]
@@ -0,0 +1,120 @@
+"""Tests for key decoding and KeyReader dispatch."""
+
+import asyncio
+
+import pytest
+
+from euryale.gem.static import KeyReader
+from euryale.gem.static.keyreader import decode
+
+
+@pytest.mark.parametrize('data, keys', [
+    ('abc', ['a', 'b', 'c']),
+    ('\033[A\033[B\033OC\033[D', ['up', 'down', 'right', 'left']),
+    ('\033[3~\033[15~', ['delete', 'f5']),
+    ('\r\t\x7f\x01', ['enter', 'tab', 'backspace', 'ctrl+a']),
+    ('\033x\033\r', ['alt+x', 'alt+enter']),
+    ('\033\033[A', ['escape', 'up']),
+    ('\033[99~', ['\033[99~']),
+])
+def test_decode(data, keys):
+    assert decode(data) == (keys, '')
+
+
+@pytest.mark.parametrize('data, keys, rest', [
+    ('a\033', ['a'], '\033'),
+    ('a\033[', ['a'], '\033['),
+    ('\033[1', [], '\033[1'),
+    ('\033[15', [], '\033[15'),
+    ('\033O', [], '\033O'),
+])
+def test_decode_holds_incomplete_sequences(data, keys, rest):
+    assert decode(data) == (keys, rest)
+
+
+@pytest.mark.parametrize('data, keys', [
+    ('\033', ['escape']),
+    ('\033[', ['alt+[']),
+    ('\033[1', ['alt+[', '1']),
+    ('\033O', ['alt+O']),
+])
+def test_decode_final_reports_what_it_has(data, keys):
+    assert decode(data, final=True) == (keys, '')
+
+
+def reader(**kwargs):
+    keys = []
+    return KeyReader(fd=0, fallback=keys.append, **kwargs), keys
+
+
+@pytest.mark.parametrize('chunks, key', [
+    ([b'\033', b'[A'], 'up'),
+    ([b'\033[', b'A'], 'up'),
+    ([b'\033[1', b'5~'], 'f5'),
+    ([b'\033O', b'P'], 'f1'),
+    ([b'\033', b'[', b'2', b'4', b'~'], 'f12'),
+])
+def test_sequences_split_across_reads(chunks, key):
+    keys_reader, keys = reader()
+    for chunk in chunks:
+        keys_reader.feed(chunk)
+    assert keys == [key]
+
+
+def test_utf8_split_across_reads():
+    keys_reader, keys = reader()
+    data = 'é'.encode('utf-8')
+    keys_reader.feed(data[:1])
+    keys_reader.feed(data[1:])
+    assert keys == ['é']
+
+
+def test_lone_escape_is_flushed_after_timeout():
+    async def main():
+        keys_reader, keys = reader(loop=asyncio.get_running_loop(),
+                                   timeout=0.01)
+        keys_reader.feed(b'\033')
+        assert keys == []
+        await asyncio.sleep(0.05)
+        assert keys == ['escape']
+
+        # the rest of a sequence in time cancels the flush
+        keys_reader.feed(b'\033')
+        keys_reader.feed(b'[B')
+        await asyncio.sleep(0.05)
+        assert keys == ['escape', 'down']
+
+    asyncio.run(main())
+
+
+def test_bindings_win_over_fallback():
+    keys_reader, keys = reader()
+    bound = []
+    keys_reader.bind('ctrl+c', bound.append)
+    keys_reader.feed(b'\x03x')
+    assert bound == ['ctrl+c'] and keys == ['x']
+    assert keys_reader.unbind('ctrl+c')
+    assert not keys_reader.unbind('ctrl+c')
+
+
+def test_coroutine_handlers_are_scheduled():
+    async def main():
+        got = []
+
+        async def handler(key):
+            got.append(key)
+
+        keys_reader = KeyReader(fd=0, loop=asyncio.get_running_loop(),
+                                bindings={'q': handler})
+        keys_reader.feed(b'q')
+        await asyncio.sleep(0)
+        assert got == ['q']
+
+    asyncio.run(main())
+
+
+def test_start_needs_a_running_loop():
+    keys_reader, keys = reader()
+    with pytest.raises(RuntimeError):
+        keys_reader.start()
+    assert not keys_reader.active
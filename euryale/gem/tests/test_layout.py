@@ -0,0 +1,74 @@
+"""Tests for box alignment and the layout cache."""
+
+import pytest
+
+from euryale.gem.static import BytesSink, Compositor
+
+
+def compositor(size=(20, 40)):
+    return Compositor(size, sink=BytesSink())
+
+
+def below(c, name, target):
+    """Make a box right below target, sharing its left edge."""
+    return c.makebox(name=name, size=(1, 3), ytarget=target,
+                     ytalign='obottom', ysalign='top', xtarget=target,
+                     xtalign='left', xsalign='aleft')
+
+
+def count_places(monkeypatch, boxes):
+    placed = []
+    for box in boxes:
+        def place(box=box, place=box._place):
+            placed.append(box.name)
+            return place()
+        monkeypatch.setattr(box, '_place', place)
+    return placed
+
+
+def test_aligned_boxes_follow_their_targets():
+    c = compositor()
+    a = c.makebox(name='a', pos=(1, 2), size=(2, 5))
+    b = below(c, 'b', a)
+    d = below(c, 'd', b)
+    c.layout()
+    assert (a.pos, b.pos, d.pos) == ((1, 2), (3, 2), (4, 2))
+
+    a.pos = (4, 6)
+    assert (b.pos, d.pos) == ((6, 6), (7, 6))
+    a.size = (3, 5)
+    assert (b.pos, d.pos) == ((7, 6), (8, 6))
+
+
+def test_layout_places_only_what_changed(monkeypatch):
+    c = compositor()
+    a = c.makebox(name='a', pos=(1, 2), size=(2, 5))
+    b = below(c, 'b', a)
+    other = c.makebox(name='other', pos=(9, 9), size=(1, 1))
+    c.layout()
+    placed = count_places(monkeypatch, [a, b, other])
+
+    c.layout()
+    assert placed == []
+
+    b.pos = (0, 0)  # aligned on both axes, but still re-placed
+    c.layout()
+    assert placed == ['b']
+
+    del placed[:]
+    a.pos = (3, 3)
+    c.layout()
+    assert sorted(placed) == ['a', 'b']
+
+
+def test_alignment_cycles_are_rejected():
+    c = compositor()
+    a = c.makebox(name='a', size=(1, 1))
+    b = below(c, 'b', a)
+    a.ytarget = b
+    with pytest.raises(ValueError):
+        c.layout()
+
+    a.ytarget = None
+    c.layout()
+    assert b.pos == (1, 0)
@@ -0,0 +1,125 @@
+"""Tests for Scheduler."""
+
+import asyncio
+
+import pytest
+
+from euryale.gem.static import BytesSink, Compositor, Scheduler
+
+
+def compositor():
+    c = Compositor((4, 10), sink=BytesSink())
+    box = c.makebox(name='box', size=(1, 3), dchar='x')
+    return c, box
+
+
+def test_requests_before_a_tick_share_one_frame():
+    async def main():
+        c, box = compositor()
+        scheduler = Scheduler(c)
+        futures = [c.request_frame() for _ in range(3)]
+        box.pos = (1, 1)
+        box.touch()
+        assert all(f is futures[0] for f in futures)
+        assert await scheduler.frame() == 1
+        assert (scheduler.frames, scheduler.requests) == (1, 4)
+        assert c.frames == 1
+        assert not scheduler.pending
+        scheduler.close()
+
+    asyncio.run(main())
+
+
+def test_frames_are_capped_to_fps():
+    async def main():
+        c, box = compositor()
+        scheduler = Scheduler(c, fps=20)
+        loop = asyncio.get_running_loop()
+        await scheduler.frame()
+        start = loop.time()
+        await scheduler.frame()
+        assert loop.time() - start >= scheduler.interval * 0.9
+        scheduler.close()
+
+    asyncio.run(main())
+
+
+def test_requests_while_compositing_are_ignored():
+    async def main():
+        c, box = compositor()
+        scheduler = Scheduler(c)
+        c.compositing = True
+        assert c.request_frame() is None
+        c.compositing = False
+        assert c.request_frame() is not None
+        scheduler.close()
+
+    asyncio.run(main())
+
+
+def test_composite_errors_reach_the_waiter():
+    async def main():
+        c, box = compositor()
+        scheduler = Scheduler(c)
+
+        def fail():
+            raise RuntimeError('boom')
+
+        c.composite = fail
+        with pytest.raises(RuntimeError):
+            await scheduler.frame()
+        scheduler.close()
+
+    asyncio.run(main())
+
+
+def test_close_cancels_the_pending_frame_and_detaches():
+    async def main():
+        c, box = compositor()
+        scheduler = Scheduler(c)
+        future = c.request_frame()
+        scheduler.close()
+        assert future.cancelled()
+        assert c.scheduler is None
+        assert c.request_frame() is None
+
+    asyncio.run(main())
+
+
+def test_requests_before_the_loop_runs_are_drawn_by_its_first_frame():
+    c, box = compositor()
+    scheduler = Scheduler(c)
+    more = c.makebox(name='more', pos=(2, 2), size=(1, 2), dchar='y')
+    more.touch()
+    assert c.request_frame() is None
+    assert not scheduler.pending
+
+    async def main():
+        return await asyncio.wait_for(scheduler.frame(), 1)
+
+    assert asyncio.run(main()) == 1
+    assert not scheduler.pending
+    assert c.grid.get(2, 2)[0] == 'y'
+
+    # and again on a later loop
+    box.pos = (3, 0)
+    assert asyncio.run(main()) == 2
+    scheduler.close()
+
+
+def test_frames_left_pending_by_a_finished_loop_are_dropped():
+    c, box = compositor()
+    scheduler = Scheduler(c, fps=1)
+
+    async def first():
+        await scheduler.frame()
+        c.request_frame()  # capped, still pending when the loop ends
+
+    asyncio.run(first())
+    assert scheduler.pending
+
+    async def second():
+        return await asyncio.wait_for(scheduler.frame(), 1)
+
+    assert asyncio.run(second()) == 2
+    scheduler.close()
@@ -0,0 +1,63 @@
+"""Tests for output sinks and headless rendering."""
+
+import io
+
+from euryale.gem.static import BytesSink, Compositor, FileSink
+
+from .vt import Terminal
+
+
+def test_bytes_sink_keeps_non_empty_writes():
+    sink = BytesSink()
+    sink.write(b'ab')
+    sink.write(b'')
+    sink.write(b'c')
+    assert (sink.getvalue(), sink.writes) == (b'abc', 2)
+    sink.clear()
+    assert sink.getvalue() == b''
+
+
+def test_file_sink_closes_only_files_it_opened(tmp_path):
+    path = str(tmp_path / 'frames')
+    sink = FileSink(path)
+    sink.write(b'frame')
+    sink.close()
+    assert sink.file.closed
+    with open(path, 'rb') as f:
+        assert f.read() == b'frame'
+
+    f = io.BytesIO()
+    sink = FileSink(f)
+    sink.write(b'frame')
+    sink.close()
+    assert f.getvalue() == b'frame'
+
+
+def test_each_frame_is_one_write():
+    sink = BytesSink()
+    c = Compositor((4, 10), sink=sink, rows=5)
+    box = c.makebox(name='box', size=(2, 3), dchar='x')
+    c.composite()
+    box.pos = (1, 4)
+    c.composite()
+    c.composite()  # nothing changed
+    assert sink.writes == 2
+
+
+def test_render_to_string_writes_nothing_and_keeps_changes():
+    sink = BytesSink()
+    c = Compositor((3, 6), sink=sink, rows=3)
+    term = Terminal(c.size)
+    box = c.makebox(name='box', size=(1, 3), dchar='x')
+    c.composite()
+    term.feed(sink.getvalue())
+    sink.clear()
+
+    box.pos = (2, 3)
+    assert c.render_to_string(color=False) == '      \n      \n   xxx'
+    assert '\033[' in c.render_to_string()
+    assert sink.getvalue() == b''
+
+    c.composite()
+    term.feed(sink.getvalue())
+    assert term.shows(c.grid) == []
@@ -0,0 +1,48 @@
+"""Tests for TBox."""
+
+from euryale.gem.static import BytesSink, Compositor
+
+from .test_dbox import count_updates
+
+
+def compositor(size=(6, 20)):
+    return Compositor(size, sink=BytesSink())
+
+
+def test_tbox_updates_only_when_its_text_changes(monkeypatch):
+    c = compositor()
+    t = c.maketbox(name='t', size=(1, 8), text='hello')
+    updates = count_updates(monkeypatch, t)
+    t.text = 'hello'
+    t.wrap = False
+    c.composite()
+    assert updates == []
+
+    count = [0]
+    t.text = lambda: 'n={}'.format(count[0])
+    assert updates == ['t']
+    c.composite()
+    assert updates == ['t']
+
+    count[0] = 1
+    assert c.render_to_string(color=False).split('\n')[0].startswith('n=1 ')
+    assert updates == ['t', 't']
+
+
+def test_text_is_written_inside_the_border():
+    c = compositor()
+    t = c.maketbox(name='t', size=(4, 8), text='one two three', wrap=True,
+                   border='default', fg='red')
+    assert t.grid.to_string(color=False).split('\n') == ['┌──────┐',
+                                                         '│one   │',
+                                                         '│two   │',
+                                                         '└──────┘']
+    assert t.grid.get(1, 1) == ('o', '31', '40')
+
+    # long lines write over the border on the right
+    t.text = 'a longer line\nb'
+    t.setwrap(False)
+    assert t.grid.to_string(color=False).split('\n') == ['┌──────┐',
+                                                         '│a longe',
+                                                         '│b     │',
+                                                         '└──────┘']
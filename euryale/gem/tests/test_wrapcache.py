@@ -0,0 +1,83 @@
+"""Tests for WrapCache."""
+
+import textwrap
+
+import pytest
+
+from euryale.gem.static import WrapCache
+
+TEXT = ('Lorem ipsum dolor sit amet, consectetur adipiscing elit.\n'
+        '\n'
+        'Sed do eiusmod tempor incididunt ut labore et dolore magna.\n'
+        'Ut enim ad minim veniam.')
+
+
+def test_without_wrap_every_newline_starts_a_line():
+    lines = WrapCache().layout('ab\ncd  \n', 10)
+    assert lines == ('ab', 'cd  ', '')
+
+
+def test_wrap_wraps_each_paragraph_on_its_own():
+    lines = WrapCache().layout(TEXT, 20, wrap=True)
+    expected = []
+    for paragraph in TEXT.split('\n'):
+        expected.extend(textwrap.wrap(paragraph, 20) or [''])
+    assert lines == tuple(expected)
+
+
+def test_strip_newlines_wraps_as_one_paragraph():
+    lines = WrapCache().layout(TEXT, 20, wrap=True, strip_newlines=True)
+    assert lines == tuple(textwrap.wrap(TEXT.replace('\n', ''), 20))
+
+
+@pytest.mark.parametrize('justify, line', [
+    ('left', 'ab    '), ('right', '    ab'), ('center', '  ab  '),
+    (None, 'ab')])
+def test_justify_pads_lines_to_width(justify, line):
+    assert WrapCache().layout('ab', 6, justify=justify) == (line,)
+
+
+def test_same_layout_is_a_hit():
+    cache = WrapCache()
+    first = cache.layout(TEXT, 20, wrap=True)
+    assert cache.layout(TEXT, 20, wrap=True) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.layout(TEXT, 21, wrap=True)
+    assert cache.misses == 2
+
+
+def test_only_changed_paragraphs_are_wrapped_again(monkeypatch):
+    cache = WrapCache()
+    cache.layout(TEXT, 20, wrap=True)
+    wrapped = []
+    wrap = cache._wrapper.wrap
+    monkeypatch.setattr(cache._wrapper, 'wrap',
+                        lambda text: wrapped.append(text) or wrap(text))
+
+    cache.layout(TEXT.replace('minim', 'MINIM'), 20, wrap=True)
+
+    assert wrapped == ['Ut enim ad MINIM veniam.']
+
+
+def test_caches_are_bounded():
+    cache = WrapCache(maxsize=2, paragraphs=3)
+    for n in range(10):
+        cache.layout('line {}\nmore {}'.format(n, n), 5, wrap=True)
+    assert list(cache.texts) == [
+        ('line 8\nmore 8', 5, True, None, False),
+        ('line 9\nmore 9', 5, True, None, False)]
+    assert len(cache.paragraphs) == 3
+
+
+def test_least_recently_used_text_is_evicted_first():
+    cache = WrapCache(maxsize=2)
+    cache.layout('a', 5)
+    cache.layout('b', 5)
+    cache.layout('a', 5)
+    cache.layout('c', 5)
+    assert [key[0] for key in cache.texts] == ['a', 'c']
+
+
+def test_size_below_one_is_an_error():
+    with pytest.raises(ValueError):
+        WrapCache(maxsize=0)
@@ -0,0 +1,115 @@
+"""Tiny terminal emulator, enough to replay what the encoder writes."""
+
+import re
+
+_ESCAPE = re.compile(r'\033\[(\??)([\d;]*)([A-Za-z@])')
+
+# terminal default colors, shown as the static default colors
+_DEFAULT_FG = 39
+_DEFAULT_BG = 49
+
+
+class Terminal:
+    """Grid of (char, fg, bg) cells driven by escape sequences.
+
+    Handles cursor position, SGR colors, erase in line and display, erase
+    characters, cursor forward and autowrap. Private modes are ignored.
+    Erased cells take the current background, like most terminals.
+
+    """
+
+    def __init__(self, size):
+        self.size = size
+        h, w = size
+        self.cells = [[(' ', 37, 40)] * w for _ in range(h)]
+        self.y = self.x = 0
+        self.fg = _DEFAULT_FG
+        self.bg = _DEFAULT_BG
+        self.wrap = False  # cursor past the last column, wraps on next char
+
+    def blank(self):
+        return (' ', 37, 40 if self.bg == _DEFAULT_BG else self.bg)
+
+    def erase(self, y, x1, x2):
+        for x in range(x1, min(x2, self.size[1])):
+            self.cells[y][x] = self.blank()
+
+    def feed(self, data):
+        h, w = self.size
+        text = data.decode('utf-8')
+        i = 0
+        while i < len(text):
+            m = _ESCAPE.match(text, i)
+            if m is not None:
+                i = m.end()
+                private, args, cmd = m.groups()
+                if private:
+                    continue
+                nums = [int(a or 0) for a in args.split(';')] if args else []
+                self.wrap = False
+                if cmd == 'H':
+                    y = (nums[0] if nums else 1) or 1
+                    x = (nums[1] if len(nums) > 1 else 1) or 1
+                    self.y = min(y, h) - 1
+                    self.x = min(x, w) - 1
+                elif cmd == 'm':
+                    for n in nums or [0]:
+                        if n == 0:
+                            self.fg, self.bg = _DEFAULT_FG, _DEFAULT_BG
+                        elif 30 <= n <= 39:
+                            self.fg = n
+                        elif 40 <= n <= 49:
+                            self.bg = n
+                elif cmd == 'X':
+                    n = nums[0] if nums else 1
+                    self.erase(self.y, self.x, self.x + n)
+                elif cmd == 'C':
+                    self.x = min(w - 1, self.x + (nums[0] if nums else 1))
+                elif cmd == 'K':
+                    self.erase(self.y, self.x, w)
+                elif cmd == 'J':
+                    n = nums[0] if nums else 0
+                    first = 0 if n == 2 else self.y + 1
+                    if n == 0:
+                        self.erase(self.y, self.x, w)
+                    for y in range(first, h):
+                        self.erase(y, 0, w)
+                else:
+                    raise AssertionError('unexpected escape ' + m.group())
+                continue
+
+            if self.wrap:
+                self.x = 0
+                self.y = min(h - 1, self.y + 1)
+                self.wrap = False
+            self.cells[self.y][self.x] = (
+                text[i],
+                37 if self.fg == _DEFAULT_FG else self.fg,
+                40 if self.bg == _DEFAULT_BG else self.bg)
+            if self.x == w - 1:
+                self.wrap = True
+            else:
+                self.x += 1
+            i += 1
+
+    def shows(self, grid):
+        """List cells that don't show what a grid holds.
+
+        The fg of blank cells isn't visible, so it isn't compared.
+
+        Returns:
+            list: (y, x, shown, expected) tuples.
+
+        """
+        wrong = []
+        for y in range(grid.size[0]):
+            for x in range(grid.size[1]):
+                char, fg, bg = grid.get(y, x)
+                expected = (char, int(fg), int(bg))
+                shown = self.cells[y][x]
+                if char == ' ':
+                    expected = expected[::2]
+                    shown = shown[::2]
+                if shown != expected:
+                    wrong.append((y, x, shown, expected))
+        return wrong
@@ -5,7 +5,9 @@
 
 from core import Character, utilities
 import gem.static as gs
+import asyncio
 import os
+import signal
 import string
 
 
@@ -14,6 +16,7 @@ class Main:
     def __init__(self):
 
         self.nan = None
+        self.ab_panel = None
 
         # honestly just define blank values for every self value you're
         # going to define later so it's not a pain
@@ -28,7 +31,7 @@ class Main:
 
         self.c = Character(utilities.read_char(self.name))
 
-        self.g = gs.Compositor(size=self.size)
+        self.g = gs.Compositor(size=self.size, fullscreen=True)
 
         detlen = max(len(i) for i in self.details_text().split("\n")) + 2
 
@@ -40,17 +43,13 @@ class Main:
         )
 
         self.name = self.g.maketbox(
+            container=self.details,
             name="name",
+            pos=(0, 1),
             size=(1, len(self.c.name)),
             text=self.c.name,
             fg="black",
-            bg="white",
-            ytarget=self.details,
-            ytalign="top",
-            ysalign="center",
-            xtarget=self.details,
-            xtalign="ileft",
-            xsalign="aleft"
+            bg="white"
         )
 
         self.ab_containers = []
@@ -63,55 +62,116 @@ class Main:
 
         self.make_ab_containers()
 
-        self.g.composite()
-
-        while True:
-
-            # check if terminal is resized and resize everything
-            ntermsize = self.get_terminal_size(fallback=(120, 29))
-            if ntermsize != termsize:
-
-                termsize = ntermsize
-                self.size = (termsize[1] - 2, termsize[0])
-
-                # resize compositor
-                # don't make this one smaller than anything else
-                self.g.resize(self.size)
-
-                # resize details
-                self.details.resize((5, self.size[1]))
-                self.name.resize((1,
-                                  len(self.c.name) if
-                                  len(self.c.name) <= self.size[1] - 2 else
-                                  self.size[1] - 2
-                                  ))
-
-                # resize skill boxes
-                self.resize_ab_containers()
+        self.prompt = self.g.maketbox(
+            name='prompt',
+            pos=(self.size[0] - 1, 0),
+            size=(1, self.size[1]),
+            text='> '
+        )
+        self.command = ''
+
+        self.termsize = termsize
+        self.refresh()
+
+        asyncio.run(self.run())
+
+    async def run(self):
+        """Render and read keys until ctrl+d."""
+        self.done = asyncio.Event()
+        self.scheduler = gs.Scheduler(self.g)
+        self.keys = gs.KeyReader(fallback=self.type_key)
+        self.keys.bind('enter', self.run_command)
+        self.keys.bind('backspace', self.delete_key)
+        self.keys.bind('ctrl+d', lambda key: self.done.set())
+
+        loop = asyncio.get_running_loop()
+        if hasattr(signal, 'SIGWINCH'):
+            loop.add_signal_handler(signal.SIGWINCH, self.resize)
+
+        with self.g, self.keys:
+            await self.scheduler.frame()
+            await self.done.wait()
+
+        if hasattr(signal, 'SIGWINCH'):
+            loop.remove_signal_handler(signal.SIGWINCH)
+        self.scheduler.close()
+
+    def resize(self):
+        """Fit everything to the terminal if its size changed.
+
+        Runs on SIGWINCH. Boxes are resized in place and re-aligned, the
+        scheduler draws the result on its next frame.
+
+        """
+        ntermsize = self.get_terminal_size(fallback=(120, 29))
+        if ntermsize == self.termsize:
+            return
+
+        self.termsize = ntermsize
+        self.size = (ntermsize[1] - 2, ntermsize[0])
+
+        with self.g.batch():
+            # resize compositor
+            # don't make this one smaller than anything else
+            self.g.resize(self.size)
+
+            # resize details
+            self.details.resize((5, self.size[1]))
+            self.name.resize((1,
+                              len(self.c.name) if
+                              len(self.c.name) <= self.size[1] - 2 else
+                              self.size[1] - 2
+                              ))
+
+            # resize skill boxes
+            self.resize_ab_containers()
+
+            self.prompt.pos = (self.size[0] - 1, 0)
+            self.prompt.resize((1, self.size[1]))
+
+    def refresh(self):
+        """Bring every box up to date with the character."""
+        with self.g.batch():
+            # no resize signal on windows, check every time instead
+            if not hasattr(signal, 'SIGWINCH'):
+                self.resize()
 
             if self.c.name != self.name.text:
                 self.name.resize((1,
                                   len(self.c.name) if
-                                  len(self.c.name) <= self.ize[1] - 2 else
+                                  len(self.c.name) <= self.size[1] - 2 else
                                   self.size[1] - 2
                                   ))
                 self.name.text = self.c.name
 
             if len(self.ab_containers) != len(self.c.ability_map):
                 self.make_ab_containers()
-                self.resize_ab_containers()
 
             self.details.text = self.details_text()
 
             self.fill_ab_containers()
 
-            self.g.composite()
-
-            again = input("> ")
-            try:  # made this shitty thing for live testing
-                exec(again)
-            except SyntaxError:
-                continue
+    def type_key(self, key):
+        """Add a typed character to the command line."""
+        if len(key) == 1 and key.isprintable():
+            self.command += key
+            self.prompt.text = '> ' + self.command
+
+    def delete_key(self, key):
+        """Remove the last character from the command line."""
+        self.command = self.command[:-1]
+        self.prompt.text = '> ' + self.command
+
+    def run_command(self, key):
+        """Run the command line and refresh everything it might change."""
+        command = self.command
+        self.command = ''
+        self.prompt.text = '> '
+        try:  # made this shitty thing for live testing
+            exec(command)
+        except SyntaxError:
+            pass
+        self.refresh()
 
     def namelookup(self, keyword=None):
         termsize = self.get_terminal_size(fallback=(120, 29))
@@ -195,74 +255,41 @@ class Main:
         return det
 
     def make_ab_containers(self):
+        if self.ab_panel is not None:
+            self.g.removeobject(self.ab_panel)
+        self.ab_panel = self.g.makebox(
+            name="abilities",
+            size=(1, 1),
+            ytarget=self.details,
+            ytalign="bottom",
+            ysalign="below",
+            xtarget=self.details,
+            xtalign="left",
+            xsalign="aleft"
+        )
         self.ab_containers = []
-        row = 0
-        rowsize = 0
-        y = 0
-        n = 0
-        for i, skill in enumerate(self.c.ability_map.keys()):
-            if i == 0:
-                self.ab_containers.append(self.g.maketbox(
-                    pos=(0, 0),
-                    name=skill,
-                    size=self.ab_box_size,
-                    border="default",
-                    ytarget=self.details,
-                    ytalign="bottom",
-                    ysalign="below",
-                    xtarget=self.details,
-                    xtalign="left",
-                    xsalign="aleft"
-                ))
-            elif y != row:
-                self.ab_containers.append(self.g.maketbox(
-                    pos=(0, 0),
-                    name=skill,
-                    size=self.ab_box_size,
-                    border="default",
-                    ytarget=self.ab_containers[i - n],
-                    ytalign="bottom",
-                    ysalign="below",
-                    xtarget=self.ab_containers[i - n],
-                    xtalign="left",
-                    xsalign="aleft"
-                ))
-                row = y
-                rowsize = 0
-                n = 0
-            else:
-                self.ab_containers.append(self.g.maketbox(
-                    pos=(0, 0),
-                    name=skill,
-                    size=self.ab_box_size,
-                    border="default",
-                    ytarget=self.ab_containers[i - 1],
-                    ytalign="top",
-                    ysalign="top",
-                    xtarget=self.ab_containers[i - 1],
-                    xtalign="oright",
-                    xsalign="aleft"
-                ))
-            rowsize += self.ab_box_size[1]
-            if rowsize + self.ab_box_size[1] >= self.size[1]:
-                y += 1
-            n += 1
+        self.ab_names = []
+        for skill in self.c.ability_map.keys():
+            box = self.g.maketbox(
+                container=self.ab_panel,
+                name=skill,
+                size=self.ab_box_size,
+                border="default"
+            )
+            self.ab_containers.append(box)
 
             self.ab_names.append(self.g.maketbox(
+                container=box,
                 name="{} title".format(skill[0:3]),
-                pos=(0, 0),
+                pos=(0, 1),
                 size=(1, 3),
                 text=skill[0:3].upper(),
                 bg="white",
-                fg="black",
-                ytarget=self.ab_containers[i],
-                ytalign="top",
-                ysalign="center",
-                xtarget=self.ab_containers[i],
-                xtalign="ileft",
-                xsalign="aleft"
+                fg="black"
             ))
 
+        self.resize_ab_containers()
+
     def fill_ab_containers(self):
         for ab in self.ab_containers:
 
@@ -294,39 +321,14 @@ class Main:
             ab.text = sk_info
 
     def resize_ab_containers(self):
-        row = 0
-        rowsize = 0
-        y = 0
-        n = 0
+        # as many boxes per row as fit, leaving at least a column free
+        h, w = self.ab_box_size
+        per_row = max(1, (self.size[1] - 1) // w)
+        rows = -(-len(self.ab_containers) // per_row)
+        self.ab_panel.resize((rows * h, min(len(self.ab_containers),
+                                            per_row) * w))
         for i, box in enumerate(self.ab_containers):
-            if i == 0:
-                box.ytarget = self.details
-                box.ytalign = "bottom"
-                box.ysalign = "below"
-                box.xtarget = self.details
-                box.xtalign = "left"
-                box.xsalign = "aleft"
-            elif y != row:
-                box.ytarget = self.ab_containers[i - n]
-                box.ytalign = "bottom"
-                box.ysalign = "below"
-                box.xtarget = self.ab_containers[i - n]
-                box.xtalign = "left"
-                box.xsalign = "aleft"
-                row = y
-                rowsize = 0
-                n = 0
-            else:
-                box.ytarget = self.ab_containers[i - 1]
-                box.ytalign = "top"
-                box.ysalign = "top"
-                box.xtarget = self.ab_containers[i - 1]
-                box.xtalign = "oright"
-                box.xsalign = "aleft"
-            rowsize += self.ab_box_size[1]
-            if rowsize + self.ab_box_size[1] >= self.size[1]:
-                y += 1
-            n += 1
+            box.pos = (i // per_row * h, i % per_row * w)
 
 
 if __name__ == "__main__":